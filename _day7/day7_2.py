@@ -1,72 +1,29 @@
+import os
 import sys
-from itertools import permutations
-from subprocess import Popen, PIPE
-
-from IntcodeComputer import IntcodeComputer
-
-def run_amplifiers(program_filename, phase_sequence, feedback_loop=False):
-    amplifiers = []
-    for phase_setting in phase_sequence:
-        # create an IntcodeComputer object for each amplifier
-        amplifier = Popen('python3 IntcodeComputer.py {}'.format(program_filename),
-                          shell=True,
-                          stdin=PIPE,
-                          stdout=PIPE)
-        amplifiers.append(amplifier)
-
-        # pass phase setting as first input
-        phase_setting = (str(phase_setting) + '\n')
-        amplifier.stdin.write(phase_setting.encode())
-        amplifier.stdin.flush()
-
-    # continuously run feedback loop until one of the amplifiers terminates
-    output_signal = b'0\n' # initial 0 signal for amplifier A
-    last_valid_output = output_signal
-    running = True
-    while running:
-        # process amplifiers left-to-right
-        for amplifier in amplifiers:
-            # pass the previous output signal as the next amplifier's input signal
-            amplifier.stdin.write(output_signal)
-            amplifier.stdin.flush()
-
-            # save the current amplifier's output signal
-            output_signal = amplifier.stdout.readline()
-
-            # check if the current amplifier's process has terminated
-            if amplifier.poll() is not None:
-                running = False
-                break
-
-            # last non-empty output signal (i.e. from before amplifiers have terminated
-            last_valid_output = output_signal.decode()
-
-        if not feedback_loop:
-            """
-            If we're not using a feedback loop configuration, then each intcode
-            computer only needs to run once.
-            """
-            break
-
-    return int(last_valid_output)
 
-def main():
-    # get input program
-    program_filename = '../IntcodePrograms/7.in'
+# make the intcode package (in the root of the repo) importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from intcode import AmplifierChain, IntcodeComputer, load
+from intcode.ParallelAmplifierSearch import ParallelAmplifierSearch
 
-    # generate all permutations of phase sequences
-    phase_sequences = permutations(range(5, 10))
-    largest_output_signal = float('-inf')
+def run_amplifiers(program_filename, phase_sequence, feedback_loop=False,
+                   create=IntcodeComputer):
+    """Returns the thruster signal for the given phase sequence. The amplifiers'
+    computers are created with create(program, input_channel, output_channel).
+    """
+    return AmplifierChain(load(program_filename), phase_sequence, feedback_loop,
+                          create=create).run()
 
-    # check the result of each phase sequence to determine which one produces
-    # the largest output signal
-    for phase_sequence in phase_sequences:
-        output_signal = run_amplifiers(program_filename,
-                                       phase_sequence,
-                                       feedback_loop=True)
+def main():
+    # get input program
+    program = load('../IntcodePrograms/7.in')
 
-        if output_signal > largest_output_signal:
-            largest_output_signal = output_signal
+    # check every permutation of phase settings to determine which one produces
+    # the largest output signal (a search this small runs in this process, while
+    # bigger ones are split between a pool of worker processes)
+    largest_output_signal, _ = ParallelAmplifierSearch(program, range(5, 10),
+                                                       feedback_loop=True).run()
 
     print(largest_output_signal)
 
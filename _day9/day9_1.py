@@ -1,4 +1,10 @@
-from IntcodeComputer import IntcodeComputer
+import os
+import sys
+
+# make the intcode package (in the root of the repo) importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from intcode import IntcodeComputer, load
 
 def main():
     # Test Programs
@@ -8,9 +14,7 @@ def main():
 
     program_filename = '../IntcodePrograms/9.in'
 
-    with open(program_filename) as f:
-        program = list(map(int, f.readline().split(',')))
-    computer = IntcodeComputer(program)
+    computer = IntcodeComputer(load(program_filename))
     computer.run_program()
 
 if __name__ == '__main__':
@@ -1,4 +1,19 @@
-from IntcodeComputer import IntcodeComputer
+import os
+import sys
+
+# make the intcode package (in the root of the repo) importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from intcode import IntcodeComputer, load
+
+def run_boost(program_filename, mode, create=IntcodeComputer):
+    """Runs the BOOST program with the given input (1 for test mode, 2 for
+    sensor boost mode), and returns its outputs. Computers are created with
+    create(program, input_channel, output_channel).
+    """
+    outputs = []
+    create(load(program_filename), [mode], outputs).run_program()
+    return outputs
 
 def main():
     """Identical to Day 9 - Part 1, except a different input is passed in."""
@@ -10,9 +25,7 @@ def main():
 
     program_filename = '../IntcodePrograms/9.in'
 
-    with open(program_filename) as f:
-        program = list(map(int, f.readline().split(',')))
-    computer = IntcodeComputer(program)
+    computer = IntcodeComputer(load(program_filename))
     computer.run_program()
 
 if __name__ == '__main__':
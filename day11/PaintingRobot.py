@@ -0,0 +1,204 @@
+import os
+import sys
+import time
+
+# make the intcode package (in the root of the repo) importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from intcode import IntcodeComputer, load
+
+# colours of the panels
+BLACK = 0
+WHITE = 1
+
+# the directions that the robot can face, clockwise from up (y grows downwards),
+# so turning is just adding 1 (right) or -1 (left) to the index
+DIRECTIONS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+class Hull():
+    """The panels of the hull, stored as one byte each in a bytearray that covers
+    a rectangle of the hull. Bit 0 of each byte is the panel's colour, and bit 1
+    is set once the panel has been painted. The rectangle starts out CHUNK
+    panels square, centred on the origin, and grows by whole chunks in whichever
+    direction the robot leaves it.
+    """
+
+    CHUNK = 64
+    PAINTED = 2
+
+    def __init__(self):
+        self.left = self.top = -self.CHUNK // 2
+        self.width = self.height = self.CHUNK
+        self.panels = bytearray(self.width * self.height)
+        # the number of panels that have been painted at least once
+        self.painted = 0
+
+    def colour(self, x, y):
+        """Returns the colour of the panel at (x, y)."""
+        column = x - self.left
+        row = y - self.top
+        if 0 <= column < self.width and 0 <= row < self.height:
+            return self.panels[row * self.width + column] & 1
+        # panels start out black
+        return BLACK
+
+    def paint(self, x, y, colour, painted=True):
+        """Sets the colour of the panel at (x, y), and marks the panel as
+        painted, unless painted is False (e.g. for the colour that a panel
+        starts out with).
+        """
+        column = x - self.left
+        row = y - self.top
+        if not (0 <= column < self.width and 0 <= row < self.height):
+            self.grow(x, y)
+            column = x - self.left
+            row = y - self.top
+
+        index = row * self.width + column
+        if not painted:
+            self.panels[index] = self.panels[index] & self.PAINTED | colour
+            return
+        if not self.panels[index] & self.PAINTED:
+            self.painted += 1
+        self.panels[index] = colour | self.PAINTED
+
+    def grow(self, x, y):
+        """Grows the rectangle by whole chunks until it covers (x, y)."""
+        left, top, right, bottom = self.left, self.top, self.left + self.width, self.top + self.height
+        while x < left:
+            left -= self.CHUNK
+        while x >= right:
+            right += self.CHUNK
+        while y < top:
+            top -= self.CHUNK
+        while y >= bottom:
+            bottom += self.CHUNK
+
+        # copy the old rows into their place in the new rectangle
+        width = right - left
+        panels = bytearray(width * (bottom - top))
+        offset = (self.top - top) * width + self.left - left
+        for row in range(self.height):
+            start = offset + row * width
+            panels[start:start + self.width] = self.panels[row * self.width:(row + 1) * self.width]
+
+        self.left, self.top, self.width, self.height = left, top, width, bottom - top
+        self.panels = panels
+
+    def bounds(self):
+        """Returns (left, top, width, height) of the smallest rectangle that
+        covers all of the white panels.
+        """
+        rows = [row for row in range(self.height)
+                if any(panel & 1 for panel in self.row(row))]
+        columns = [column for column in range(self.width)
+                   if any(self.panels[row * self.width + column] & 1 for row in rows)]
+        if not rows:
+            return 0, 0, 0, 0
+        return (self.left + columns[0], self.top + rows[0],
+                columns[-1] - columns[0] + 1, rows[-1] - rows[0] + 1)
+
+    def row(self, row):
+        return self.panels[row * self.width:(row + 1) * self.width]
+
+class PaintingRobot():
+    """The emergency hull painting robot from day 11, with its program running
+    in this process (with no rendering, so it can run headless).
+
+    The robot's camera is the computer's input channel and its controls are the
+    computer's output channel, so the program runs straight through with
+    run_program(), calling back into the robot for every input and output. The
+    computer is created with create(program, input_channel, output_channel),
+    and any keyword arguments are passed to it (e.g. compile_program=True).
+    """
+
+    def __init__(self, program, starting_colour=BLACK, create=IntcodeComputer, **options):
+        self.hull = Hull()
+        self.x = self.y = 0
+        self.direction = 0 # index into DIRECTIONS
+        if starting_colour != BLACK:
+            # the robot hasn't painted the starting panel (yet)
+            self.hull.paint(0, 0, starting_colour, painted=False)
+
+        # outputs alternate between a colour to paint and a direction to turn
+        self.painting = True
+        self.computer = create(program, self.camera, self.control, **options)
+        self.wall_time = 0
+
+    def camera(self):
+        """Returns the colour of the panel that the robot is over."""
+        return self.hull.colour(self.x, self.y)
+
+    def control(self, value):
+        """Paints the current panel, or turns (0: left, 1: right) and moves
+        forward one panel.
+        """
+        if self.painting:
+            self.hull.paint(self.x, self.y, value)
+        else:
+            self.direction = (self.direction + (1 if value else -1)) % 4
+            dx, dy = DIRECTIONS[self.direction]
+            self.x += dx
+            self.y += dy
+        self.painting = not self.painting
+
+    def run(self):
+        """Runs the robot until its program halts, and returns the hull."""
+        start = time.perf_counter()
+        try:
+            self.computer.run_program()
+        finally:
+            self.wall_time += time.perf_counter() - start
+        return self.hull
+
+    @property
+    def steps_per_second(self):
+        """The number of steps taken per second of running. A step is a single
+        dispatch (see IntcodeComputer.run()), so with compiled blocks or fused
+        instructions, a step may execute several instructions. It's 0 until
+        the robot has run.
+        """
+        if not self.wall_time:
+            return 0
+        return self.computer.steps / self.wall_time
+
+def main():
+    """When called from the command line with the robot's program, run it
+    headless and report how many panels it painted, and how fast it ran.
+
+    Usage: python3 PaintingRobot.py PROGRAM [--white] [--compile-blocks]
+                                            [--fuse-instructions] [--compile-program]
+    """
+    flags = sys.argv[2:]
+    robot = PaintingRobot(load(sys.argv[1]),
+                          WHITE if '--white' in flags else BLACK,
+                          compile_blocks='--compile-blocks' in flags,
+                          fuse_instructions='--fuse-instructions' in flags,
+                          compile_program='--compile-program' in flags)
+    robot.run()
+    print('{} panels painted; {:,} steps in {:.3f}s ({:,.0f} steps/s)'.format(
+        robot.hull.painted, robot.computer.steps, robot.wall_time, robot.steps_per_second))
+
+def test():
+    # a robot that's never told to paint hasn't painted its white starting panel
+    robot = PaintingRobot([99], WHITE)
+    assert robot.steps_per_second == 0
+    hull = robot.run()
+    assert hull.painted == 0
+    assert hull.colour(0, 0) == WHITE
+
+    # paint the starting panel black and turn right, then paint the next
+    # panel the colour that the camera sees (black) and turn left, which leaves
+    # the robot facing up, one panel above it
+    program = [3, 100, 104, 0, 104, 1, 3, 100, 4, 100, 104, 0, 99]
+    for starting_colour in (BLACK, WHITE):
+        robot = PaintingRobot(program, starting_colour)
+        hull = robot.run()
+        assert hull.painted == 2
+        assert hull.colour(0, 0) == hull.colour(1, 0) == BLACK
+        assert (robot.x, robot.y, robot.direction) == (1, -1, 0)
+        assert robot.computer.steps == 6
+
+if __name__ == '__main__':
+    # test()
+    main()
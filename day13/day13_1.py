@@ -1,16 +1,26 @@
-from subprocess import Popen, PIPE
+import os
+import sys
+
+# make the intcode package (in the root of the repo) importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from intcode import IntcodeComputer, NEEDS_INPUT, load
 
 def get_game_output(cabinet):
-    """Gets the next output signal from the arcade cabinet.
+    """Gets the next output signal from the arcade cabinet, or None once the
+    cabinet has stopped drawing (i.e. the game has halted, or is waiting for
+    joystick input).
 
     Output signals are of the form:
         x - tile's distance from the left
         y - tile's distance from the top
         tile_id - the type of tile
     """
-    x = int(cabinet.stdout.readline().decode().rstrip())
-    y = int(cabinet.stdout.readline().decode().rstrip())
-    tile_id = int(cabinet.stdout.readline().decode().rstrip())
+    x = next(cabinet, None)
+    if x is None or x == NEEDS_INPUT:
+        return None
+    y = next(cabinet)
+    tile_id = next(cabinet)
     return x, y, tile_id
 
 def draw_game(grid, max_x, max_y):
@@ -34,19 +44,16 @@ def draw_game(grid, max_x, max_y):
 
 def run_game(program_filename):
     """Run the game. The final grid will be printed to the terminal."""
-    cabinet = Popen('python3 ../IntcodePrograms/IntcodeComputer.py {}'.format(program_filename),
-                    shell=True,
-                    stdin=PIPE,
-                    stdout=PIPE)
+    cabinet = IntcodeComputer(load(program_filename)).run_iter()
     grid = {}
     max_x = 0
     max_y = 0
     while True:
-        try:
-            # check if the game has sent any more output
-            x, y, tile_id = get_game_output(cabinet)
-        except ValueError:
+        # check if the game has sent any more output
+        output = get_game_output(cabinet)
+        if output is None:
             break
+        x, y, tile_id = output
 
         # keep track of the dimensions of the grid
         max_x = max(x + 1, max_x)
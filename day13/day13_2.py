@@ -1,30 +1,10 @@
 import os
-from subprocess import Popen, PIPE
+import sys
 
-def send_game_input(cabinet, signal):
-    """Send input to the cabinet (to control the jostick).
+# make the intcode package (in the root of the repo) importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
-    Valid signals:
-    -1 : move the paddle to the left
-     0 : keep the paddle in its current position
-     1 : move the paddle to the right.
-    """
-    signal = str(signal) + '\n'
-    cabinet.stdin.write(signal.encode())
-    cabinet.stdin.flush()
-
-def get_game_output(cabinet):
-    """Gets the next output signal from the arcade cabinet.
-
-    Output signals are of the form:
-        x - tile's distance from the left
-        y - tile's distance from the top
-        tile_id - the type of tile
-    """
-    x = int(cabinet.stdout.readline().decode().rstrip())
-    y = int(cabinet.stdout.readline().decode().rstrip())
-    tile_id = int(cabinet.stdout.readline().decode().rstrip())
-    return x, y, tile_id
+from intcode import IntcodeComputer, load
 
 def draw_game(tile_coordinates, max_x, max_y):
     """Prints the contents of the game's grid to the terminal."""
@@ -58,44 +38,68 @@ def draw_game(tile_coordinates, max_x, max_y):
         print()
     print("Score: {}".format(score))
 
-def run_game(program_filename):
-    """Run the game. The final grid will be printed to the terminal."""
-    cabinet = Popen('python3 ../IntcodePrograms/IntcodeComputer.py {}'.format(program_filename),
-                    shell=True,
-                    stdin=PIPE,
-                    stdout=PIPE)
+def run_game(program_filename, create=IntcodeComputer, draw=True):
+    """Run the game, and return the final score. The grid is printed to the
+    terminal as it changes, unless draw is False. Computers are created with
+    create(program, input_channel, output_channel).
+    """
     tile_coordinates = {}
     max_x = 0
     max_y = 0
     paddle_position = 0
     ball_position = 0
+    output = []
 
-    # run game until subprocess terminates
-    while cabinet.poll() is None:
-        # get game output (description of tiles)
-        x, y, tile_id = get_game_output(cabinet)
+    def get_game_input():
+        """Gets the next joystick input for the cabinet.
+
+        Valid signals:
+        -1 : move the paddle to the left
+         0 : keep the paddle in its current position
+         1 : move the paddle to the right.
+        """
+        # always move paddle under the ball's current position
+        if paddle_position == ball_position:
+            return 0
+        elif paddle_position < ball_position:
+            return 1
+        elif paddle_position > ball_position:
+            return -1
+
+    def send_game_output(signal):
+        """Receives the next output signal from the arcade cabinet.
+
+        Output signals come in groups of three:
+            x - tile's distance from the left
+            y - tile's distance from the top
+            tile_id - the type of tile
+        """
+        nonlocal max_x, max_y, paddle_position, ball_position
+        output.append(signal)
+        if len(output) < 3:
+            return
+        x, y, tile_id = output
+        output.clear()
         tile_coordinates[(x, y)] = tile_id
 
         # keep track of the dimensions of the game's grid
         max_x = max(x + 1, max_x)
         max_y = max(y, max_y)
 
-        # always move paddle under the ball's current position
         if tile_id == 3:
             paddle_position = x
         elif tile_id == 4:
             ball_position = x
 
-            if paddle_position == ball_position:
-                send_game_input(cabinet, 0)
-            elif paddle_position < ball_position:
-                send_game_input(cabinet, 1)
-            elif paddle_position > ball_position:
-                send_game_input(cabinet, -1)
-
         # clear the terminal and print the game
-        os.system('clear')
-        draw_game(tile_coordinates, max_x, max_y)
+        if draw:
+            os.system('clear')
+            draw_game(tile_coordinates, max_x, max_y)
+
+    # run game until the program terminates
+    cabinet = create(load(program_filename), get_game_input, send_game_output)
+    cabinet.run_program()
+    return tile_coordinates.get((-1, 0), 0)
 
 def main():
     program_filename = '../IntcodePrograms/13.in'
@@ -1,5 +1,11 @@
+import os
+import sys
 from collections import defaultdict, deque
-from subprocess import Popen, PIPE
+
+# make the intcode package (in the root of the repo) importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from intcode import IntcodeComputer, load
 
 def time_to_fill(G, oxygen_location):
     visited = set()
@@ -22,35 +28,30 @@ def time_to_fill(G, oxygen_location):
     return max(distances.values())
 
 def send_move(droid, move):
-    """Send a movement command to the droid.
+    """Send a movement command to the droid, and return its status code.
+
+    Movement commands:
     1: north
     2: south
     3: west
     4: east
-    """
-    move = str(move) + '\n'
-    droid.stdin.write(move.encode())
-    droid.stdin.flush()
 
-def get_status_code(droid):
-    """Get the latest status code from the droid.
+    Status codes:
     0: the droid hit a wall
     1: the droid has moved one step in the requested direction
     2: the droid has moved one step in the requested direction, and has located
        the oxygen system
     """
-    status_code = int(droid.stdout.readline().decode().rstrip())
+    status_code = droid.send(move)
+    next(droid) # run until the droid asks for its next movement command
     return status_code
 
-
 def run_droid(program):
     """Continuously run the droid program until all cells in the grid have been
     visited.
     """
-    droid = Popen('python3 ../IntcodePrograms/IntcodeComputer.py {}'.format(program),
-                  shell=True,
-                  stdin=PIPE,
-                  stdout=PIPE)
+    droid = IntcodeComputer(load(program)).run_iter()
+    next(droid) # run until the droid asks for its first movement command
     x = y = 0
     graph = defaultdict(list)
     MOVES = {1: (0, 1),  # north
@@ -63,7 +64,7 @@ def run_droid(program):
     # North, South, West, East
     tried_directions = defaultdict(lambda:[False, False, False, False])
 
-    while droid.poll() is None:
+    while True:
         # try to get the next unexplored direction
         try:
             next_direction = tried_directions[(x, y)].index(False) + 1
@@ -71,23 +72,22 @@ def run_droid(program):
         except ValueError:
             # if all cells in the grid have been visited
             if not stack:
-                droid.kill()
+                droid.close()
                 break
             # move back in the opposite direction of the latest movement command
             backtrack_direction = stack.pop()
             x = x + MOVES[backtrack_direction][0]
             y = y + MOVES[backtrack_direction][1]
+            # ignore status code (which will always be a 1)
             send_move(droid, backtrack_direction)
-            get_status_code(droid) # ignore status code (which will always be a 1)
             continue
 
         # try to move in the next unexplored direction
         tried_directions[(x, y)][next_direction - 1] = True
-        send_move(droid, next_direction)
+        status_code = send_move(droid, next_direction)
         next_x = x + MOVES[next_direction][0]
         next_y = y + MOVES[next_direction][1]
 
-        status_code = get_status_code(droid)
         if status_code == 0:
             # if the droid wasn't able to move, try the next direction
             continue
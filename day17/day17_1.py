@@ -1,16 +1,17 @@
-from subprocess import Popen, PIPE
+import os
+import sys
+
+# make the intcode package (in the root of the repo) importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from intcode import load, run
 
 def get_alignment_parameters_sum(program):
     """Calculates the sum of the alignment paraemters for the scaffold
     intersections, as described in the problem statement.
     """
-    robot = Popen('python3 ../IntcodePrograms/IntcodeComputer.py {}'.format(program),
-                  shell=True,
-                  stdin=PIPE,
-                  stdout=PIPE)
-
-    robot_signal = robot.communicate()
-    robot_signal = robot_signal[0].decode().strip(',').split('\n')[:-1]
+    robot_signal = []
+    run(load(program), output_channel=robot_signal)
 
     # convert robot signal to a grid representation
     grid = []
@@ -19,19 +20,19 @@ def get_alignment_parameters_sum(program):
     col = 0
     scaffolding = set()
     for char in robot_signal:
-        if char == '35':
+        if char == 35:
             line.append('#')
             scaffolding.add((row, col))
-        elif char == '46':
+        elif char == 46:
             line.append('.')
         else:
-            if char != '10':
-                line.append(chr(int(char)))
+            if char != 10:
+                line.append(chr(char))
 
         col += 1
 
         # start a new row
-        if char == '10':
+        if char == 10:
             grid.append(line)
             line = []
             row += 1
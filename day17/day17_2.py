@@ -1,25 +1,18 @@
-from subprocess import Popen, PIPE
+import os
+import sys
 
-def send_char(robot, char):
-    """Send an ascii char to the robot."""
-    char = char + '\n'
-    robot.stdin.write(char.encode())
-    robot.stdin.flush()
+# make the intcode package (in the root of the repo) importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
-def get_output(robot):
-    """Get the robot's output."""
-    output = robot.stdout.readline().decode().rstrip()
-    return output
+from intcode import IntcodeComputer, load
 
-def run_robot(program):
+def run_robot(program, create=IntcodeComputer):
     """Supply a series of instructions to the robot until it's completed its
-    task. Then, get its output (i.e. how much dust the robot has collected)
+    task. Then, get its output (i.e. how much dust the robot has collected).
+    Computers are created with create(program, input_channel, output_channel).
     """
-    robot = Popen('python3 ../IntcodePrograms/IntcodeComputer.py {}'.format(program),
-                  shell=True,
-                  stdin=PIPE,
-                  stdout=PIPE)
-    
+    robot_input = []
+
     # hand-calculated compressed path (and subroutines)
     # traverses the entire scaffolding
     main_routine ='A,B,A,B,C,B,A,C,B,C'
@@ -31,20 +24,16 @@ def run_robot(program):
     # each char
     for line in [main_routine, a, b, c]:
         for char in line:
-            send_char(robot, str(ord(char))) # send move command
-        send_char(robot, '10')               # send newline at end of routine
-    send_char(robot, str(ord('n'))) # decline live video feed
-    send_char(robot, '10')
-    
-    # get all output from robot; we can discard everything but the last line,
+            robot_input.append(ord(char)) # send move command
+        robot_input.append(10)            # send newline at end of routine
+    robot_input.append(ord('n')) # decline live video feed
+    robot_input.append(10)
+
+    # get all output from robot; we can discard everything but the last value,
     # since the robot outputs the entire grid before outputting the dust value
-    last_line = None
-    while True:
-        dust = get_output(robot)
-        if dust == '':
-            break
-        last_line = dust
-    return last_line
+    robot_output = []
+    create(load(program), robot_input, robot_output).run_program()
+    return robot_output[-1]
 
 def main():
     program = '../IntcodePrograms/17-2.in'
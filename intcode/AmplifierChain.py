@@ -0,0 +1,194 @@
+from collections import deque
+
+from .IntcodeComputer import IntcodeComputer, HALTED, OUTPUT_READY
+
+class AmplifierChain():
+    """A series of amplifiers (as in day 7), each running its own copy of the
+    same program in this process, with the output of each one wired to the input
+    of the next.
+
+    Each amplifier's first input is its phase setting, and the first amplifier
+    then gets an input signal of 0. Every output signal is appended straight to
+    the next amplifier's input channel (a deque). With a feedback loop, the
+    last amplifier's output signals go back to the first amplifier, and the
+    amplifiers take turns running until they need a signal that hasn't been
+    sent yet, until they've all halted. The amplifiers' computers are created
+    with create(program, input_channel, output_channel), and any keyword
+    arguments are passed to them (e.g. compile_program=True).
+    """
+
+    def __init__(self, program, phase_sequence, feedback_loop=False, create=IntcodeComputer,
+                 **options):
+        self.feedback_loop = feedback_loop
+        # the input channel of each amplifier
+        self.channels = [deque([phase_setting]) for phase_setting in phase_sequence]
+        # the last signal sent to the thrusters, by the last amplifier
+        self.thruster_signal = None
+
+        outputs = self.channels[1:] + [self.send_to_thrusters]
+        self.amplifiers = [create(program, channel, output, **options)
+                           for channel, output in zip(self.channels, outputs)]
+
+    def send_to_thrusters(self, signal):
+        self.thruster_signal = signal
+        if self.feedback_loop:
+            self.channels[0].append(signal)
+
+    def run(self, input_signal=0):
+        """Runs the amplifiers until they have all halted, and returns the final
+        signal sent to the thrusters. Raises RuntimeError if the amplifiers are
+        all waiting for signals that none of them is going to send.
+        """
+        self.channels[0].append(input_signal)
+
+        running = list(self.amplifiers)
+        while running:
+            waiting = []
+            progress = False
+            for amplifier in running:
+                steps = amplifier.steps
+                # run until the amplifier needs a signal that hasn't been sent yet
+                status = amplifier.run()
+                while status == OUTPUT_READY:
+                    status = amplifier.run()
+                if status != HALTED:
+                    waiting.append(amplifier)
+                progress = progress or status == HALTED or amplifier.steps != steps
+
+            if not progress:
+                raise RuntimeError('the amplifiers are deadlocked, waiting for signals')
+            running = waiting
+
+        return self.thruster_signal
+
+def run_amplifiers(program, phase_sequence, feedback_loop=False, **options):
+    """Returns the thruster signal produced by a chain of amplifiers running the
+    given program, with the given phase settings (see AmplifierChain).
+    """
+    return AmplifierChain(program, phase_sequence, feedback_loop, **options).run()
+
+def amplifier_count_for(phase_settings, amplifier_count):
+    """Returns the number of amplifiers in the sequences of distinct phase
+    settings that a search tries (by default, as many as there are phase
+    settings). Raises ValueError if there can't be any such sequences.
+    """
+    if amplifier_count is None:
+        return len(phase_settings)
+    if not 1 <= amplifier_count <= len(phase_settings):
+        raise ValueError('{} amplifiers can\'t each have a different one of {} phase '
+                         'settings'.format(amplifier_count, len(phase_settings)))
+    return amplifier_count
+
+class AmplifierSearch():
+    """Finds the phase sequence that gives the highest thruster signal for a
+    chain of amplifiers without a feedback loop, trying every sequence of
+    amplifier_count distinct phase settings (by default, as many as there are
+    phase settings).
+
+    Sequences that start with the same phase settings run the same amplifiers
+    up to the point where they differ, so rather than running each sequence
+    from scratch, the search walks the tree of sequences depth first, carrying
+    the signal from each prefix down to its extensions. An amplifier's output
+    only depends on its phase setting and input signal, so outputs are also
+    cached by (phase setting, input signal), across the whole tree. Any keyword
+    arguments are passed to the IntcodeComputers.
+    """
+
+    def __init__(self, program, phase_settings=range(5), amplifier_count=None, **options):
+        self.program = program
+        self.phase_settings = list(phase_settings)
+        self.amplifier_count = amplifier_count_for(self.phase_settings, amplifier_count)
+        self.options = options
+
+        # each amplifier's output signal, keyed by (phase setting, input signal)
+        self.outputs = {}
+        # the number of times that an amplifier was actually run
+        self.amplifier_runs = 0
+
+    def amplify(self, phase_setting, signal):
+        """Returns the output signal of an amplifier with the given phase setting
+        and input signal.
+        """
+        key = (phase_setting, signal)
+        if key not in self.outputs:
+            outputs = []
+            IntcodeComputer(self.program, deque(key), outputs, **self.options).run_program()
+            self.outputs[key] = outputs[-1]
+            self.amplifier_runs += 1
+        return self.outputs[key]
+
+    def run(self, input_signal=0, prefix=()):
+        """Returns the highest thruster signal, along with the phase sequence
+        that produced it, out of the sequences that start with the given prefix.
+        """
+        self.best_signal = None
+        self.best_sequence = None
+        # the number of phase sequences tried
+        self.sequences = 0
+
+        signal = input_signal
+        for phase_setting in prefix:
+            signal = self.amplify(phase_setting, signal)
+        self.visit(list(prefix), signal)
+        return self.best_signal, self.best_sequence
+
+    def visit(self, sequence, signal):
+        """Tries every extension of the given phase sequence, which produced the
+        given signal.
+        """
+        if len(sequence) == self.amplifier_count:
+            self.sequences += 1
+            if self.best_signal is None or signal > self.best_signal:
+                self.best_signal = signal
+                self.best_sequence = tuple(sequence)
+            return
+
+        for phase_setting in self.phase_settings:
+            if phase_setting in sequence:
+                continue
+            sequence.append(phase_setting)
+            self.visit(sequence, self.amplify(phase_setting, signal))
+            sequence.pop()
+
+def test():
+    from itertools import permutations
+    import os
+
+    from .IntcodeComputer import load
+
+    # the examples from the day 7 puzzle
+    program = [3, 15, 3, 16, 1002, 16, 10, 16, 1, 16, 15, 15, 4, 15, 99, 0, 0]
+    assert run_amplifiers(program, (4, 3, 2, 1, 0)) == 43210
+    search = AmplifierSearch(program)
+    assert search.run() == (43210, (4, 3, 2, 1, 0)) and search.sequences == 120
+    # each amplifier's output is only computed once for each input signal
+    assert search.amplifier_runs < 5 * 120
+    assert search.run(prefix=(0, 1)) == (1432, (0, 1, 4, 3, 2)) and search.sequences == 6
+    assert AmplifierSearch(program, range(7), 3).run()[1] == (6, 5, 4)
+
+    program = [3, 26, 1001, 26, -4, 26, 3, 27, 1002, 27, 2, 27, 1, 27, 26, 27, 4, 27, 1001,
+               28, -1, 28, 1005, 28, 6, 99, 0, 0, 5]
+    for options in [{}, {'compile_blocks': True}, {'compile_program': True}]:
+        assert run_amplifiers(program, (9, 8, 7, 6, 5), True, **options) == 139629729
+
+    filename = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                            'IntcodePrograms', '7.in')
+    program = load(filename)
+    signal, phase_sequence = AmplifierSearch(program).run()
+    assert signal == 17440 and run_amplifiers(program, phase_sequence) == 17440
+    assert max(run_amplifiers(program, phase_sequence, True)
+               for phase_sequence in permutations(range(5, 10))) == 27561242
+
+    # amplifiers waiting for signals that never come are deadlocked
+    try:
+        AmplifierChain([3, 0, 3, 0, 99], (0, 1)).run()
+        assert False, 'deadlock not detected'
+    except RuntimeError:
+        pass
+
+    for amplifier_count in [0, 6]:
+        try:
+            amplifier_count_for(range(5), amplifier_count)
+            assert False, 'invalid amplifier count accepted'
+        except ValueError:
+            pass
@@ -0,0 +1,28 @@
+import sys
+
+class Arguments():
+    """The command line arguments of one of the package's commands. Options and
+    switches are taken out of the arguments as they're parsed, so whatever is
+    left over (in self.args) is the command's positional arguments.
+    """
+
+    def __init__(self, args=None):
+        self.args = list(sys.argv[1:] if args is None else args)
+
+    def option(self, flag, default=None):
+        """Returns the value that follows the given flag (e.g. --repeat 3), or the
+        default if the flag isn't given.
+        """
+        if flag not in self.args:
+            return default
+        index = self.args.index(flag)
+        value = self.args[index + 1]
+        del self.args[index:index + 2]
+        return value
+
+    def switch(self, flag):
+        """Returns whether the given flag (e.g. --save-baseline) is given."""
+        if flag not in self.args:
+            return False
+        self.args.remove(flag)
+        return True
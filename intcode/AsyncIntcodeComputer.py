@@ -0,0 +1,82 @@
+import asyncio
+from collections import deque
+
+from .IntcodeComputer import IntcodeComputer, HALTED, NEEDS_INPUT, OUTPUT_READY
+
+class AsyncIntcodeComputer():
+    """An asyncio facade over IntcodeComputer, whose input values are awaited
+    from an asyncio.Queue and whose output values are put into another one.
+    Networks of computers (e.g. the day 7 amplifier feedback loop) can then be
+    wired together as a graph of queues, and run as tasks on one event loop.
+
+    The program runs in timeslices of up to timeslice steps (see
+    IntcodeComputer.run()), and gives control back to the event loop between
+    them, so a long computation doesn't block the other tasks. Any other keyword
+    arguments are passed to the IntcodeComputer (e.g. compile_blocks=True).
+    """
+
+    def __init__(self, program, input_queue=None, output_queue=None, timeslice=1000,
+                 **options):
+        self.input_queue = asyncio.Queue() if input_queue is None else input_queue
+        self.output_queue = asyncio.Queue() if output_queue is None else output_queue
+        self.timeslice = timeslice
+
+        # the computer's own channels, which are moved to and from the queues
+        self.inputs = deque()
+        self.outputs = deque()
+        self.computer = IntcodeComputer(program, self.inputs, self.outputs, **options)
+
+    async def run(self):
+        """Runs the program until it halts, and returns its final memory."""
+        computer = self.computer
+        deadline = computer.steps + self.timeslice
+        while True:
+            status = computer.run(deadline - computer.steps)
+
+            if status == HALTED:
+                return computer.program
+
+            if status == NEEDS_INPUT:
+                self.inputs.append(await self.input_queue.get())
+            elif status == OUTPUT_READY:
+                # waits if the output queue is bounded and full
+                await self.output_queue.put(self.outputs.popleft())
+            else:
+                # the timeslice is over; let the other tasks run
+                await asyncio.sleep(0)
+                deadline = computer.steps + self.timeslice
+
+def test():
+    from itertools import permutations
+    import os
+
+    from .IntcodeComputer import load
+
+    async def feedback_loop(program, phase_sequence, timeslice):
+        """Returns the last signal of a day 7 amplifier feedback loop."""
+        queues = [asyncio.Queue() for _ in phase_sequence]
+        for queue, phase_setting in zip(queues, phase_sequence):
+            queue.put_nowait(phase_setting)
+        queues[0].put_nowait(0)
+
+        amplifiers = [AsyncIntcodeComputer(program, queue, queues[(i + 1) % len(queues)],
+                                           timeslice)
+                      for i, queue in enumerate(queues)]
+        await asyncio.gather(*(amplifier.run() for amplifier in amplifiers))
+        return queues[0].get_nowait()
+
+    # the example from the day 7 puzzle
+    program = [3, 26, 1001, 26, -4, 26, 3, 27, 1002, 27, 2, 27, 1, 27, 26, 27, 4, 27, 1001,
+               28, -1, 28, 1005, 28, 6, 99, 0, 0, 5]
+    for timeslice in [1, 3, 1000]:
+        assert asyncio.run(feedback_loop(program, (9, 8, 7, 6, 5), timeslice)) == 139629729
+
+    filename = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                            'IntcodePrograms', '7.in')
+    program = load(filename)
+    assert max(asyncio.run(feedback_loop(program, phase_sequence, 1000))
+               for phase_sequence in permutations(range(5, 10))) == 27561242
+
+    # the final memory is returned
+    memory = asyncio.run(AsyncIntcodeComputer([1, 0, 0, 0, 99]).run())
+    assert memory == [2, 0, 0, 0, 99]
@@ -0,0 +1,257 @@
+from collections import deque
+
+import numpy as np
+
+class BatchComputer():
+    """Runs many instances of an Intcode program in lock-step, with their state
+    held in NumPy arrays: a memory matrix (one row per instance), along with
+    program counter and relative base vectors.
+
+    On each step, the instances are grouped by the opcode that they're about to
+    execute, and each group is executed with a single vectorized operation.
+    Instances whose control flow diverges simply end up in different groups, so
+    parameter sweeps (e.g. trying every noun and verb in day 2, or every phase
+    sequence in day 7) run at the speed of NumPy rather than the speed of a
+    Python loop per instance.
+
+    Memory has a fixed size (by default, twice the length of the program), and
+    values are 64-bit integers, so programs that use addresses beyond the end of
+    memory or values that don't fit in 64 bits should use IntcodeComputer.
+    Inputs and outputs are rare compared to the other instructions, so they're
+    handled one instance at a time.
+    """
+
+    def __init__(self, program, count, memory_size=None):
+        if memory_size is None:
+            memory_size = 2 * len(program)
+
+        self.count = count
+        self.memory = np.zeros((count, memory_size), dtype=np.int64)
+        self.memory[:, :len(program)] = program
+        self.pc = np.zeros(count, dtype=np.int64)
+        self.relative_base = np.zeros(count, dtype=np.int64)
+
+        # instances that have halted, and instances that are waiting for input
+        self.halted = np.zeros(count, dtype=bool)
+        self.waiting = np.zeros(count, dtype=bool)
+
+        # each instance's pending inputs, and the outputs that it has produced
+        self.inputs = [deque() for _ in range(count)]
+        self.outputs = [[] for _ in range(count)]
+
+        self.jump_table = {1: self.op_1,
+                           2: self.op_2,
+                           3: self.op_3,
+                           4: self.op_4,
+                           5: self.op_5,
+                           6: self.op_6,
+                           7: self.op_7,
+                           8: self.op_8,
+                           9: self.op_9}
+
+    def send(self, values, instances=None):
+        """Queues one input value for each of the given instances (by default,
+        all of them). Instances that were waiting for input can then continue.
+        """
+        if instances is None:
+            instances = range(self.count)
+
+        for instance, value in zip(instances, values):
+            self.inputs[instance].append(int(value))
+            self.waiting[instance] = False
+
+    def run(self, max_steps=None):
+        """Runs every instance until it halts or needs more input than it has
+        been sent (or until max_steps steps have been taken). Returns the number
+        of steps that were taken.
+        """
+        steps = 0
+        while max_steps is None or steps < max_steps:
+            running = np.flatnonzero(~(self.halted | self.waiting))
+            if len(running) == 0:
+                break
+
+            check_addresses(self.pc[running])
+            opcodes = self.memory[running, self.pc[running]]
+            for opcode in np.unique(opcodes):
+                self.execute(int(opcode), running[opcodes == opcode])
+
+            steps += 1
+
+        return steps
+
+    def execute(self, opcode, instances):
+        """Executes the given opcode for each of the given instances."""
+        # halt instruction
+        if opcode == 99:
+            self.halted[instances] = True
+            return
+
+        operation = self.jump_table.get(opcode % 100)
+        if operation is None:
+            raise ValueError('invalid opcode {} at {}'.format(opcode, self.pc[instances[0]]))
+
+        # get parameter modes in order, from right to left
+        modes = (opcode // 100 % 10, opcode // 1000 % 10, opcode // 10000 % 10)
+        operation(instances, modes)
+
+    def get_parameters(self, instances, modes, n):
+        """Returns vectors holding the next n "get" parameters (i.e. parameters
+        that an instruction reads from) of each of the given instances.
+        """
+        parameters = []
+        for i in range(1, n + 1):
+            mode = modes[i - 1]
+            parameter_register_values = self.memory[instances, self.pc[instances] + i]
+
+            # position mode
+            if mode == 0:
+                check_addresses(parameter_register_values)
+                parameter = self.memory[instances, parameter_register_values]
+
+            # immediate mode
+            elif mode == 1:
+                parameter = parameter_register_values
+
+            # relative mode
+            elif mode == 2:
+                addresses = self.relative_base[instances] + parameter_register_values
+                check_addresses(addresses)
+                parameter = self.memory[instances, addresses]
+
+            parameters.append(parameter)
+
+        return parameters
+
+    def set_parameter(self, instances, modes, n):
+        """Returns a vector holding the address that the nth parameter of each of
+        the given instances' current instruction refers to. Used to obtain "set"
+        parameters (i.e. parameters that an instruction writes to)
+        """
+        parameter_register_values = self.memory[instances, self.pc[instances] + n]
+
+        # relative mode
+        if modes[n - 1] == 2:
+            parameter_register_values = self.relative_base[instances] + parameter_register_values
+
+        check_addresses(parameter_register_values)
+        return parameter_register_values
+
+    #############################
+    ########## Opcodes ##########
+    #############################
+
+    def op_1(self, instances, modes):
+        """Addition Operation"""
+        addend1, addend2 = self.get_parameters(instances, modes, 2)
+        output_registers = self.set_parameter(instances, modes, 3)
+        self.memory[instances, output_registers] = addend1 + addend2
+        self.pc[instances] += 4
+
+    def op_2(self, instances, modes):
+        """Multiplication Operation"""
+        multiplicand1, multiplicand2 = self.get_parameters(instances, modes, 2)
+        output_registers = self.set_parameter(instances, modes, 3)
+        self.memory[instances, output_registers] = multiplicand1 * multiplicand2
+        self.pc[instances] += 4
+
+    def op_3(self, instances, modes):
+        """Input Operation"""
+        save_to_registers = self.set_parameter(instances, modes, 1)
+        for instance, register in zip(instances, save_to_registers):
+            # wait until an input value has been sent to this instance
+            if not self.inputs[instance]:
+                self.waiting[instance] = True
+                continue
+
+            self.memory[instance, register] = self.inputs[instance].popleft()
+            self.pc[instance] += 2
+
+    def op_4(self, instances, modes):
+        """Output Operation"""
+        outputs = self.get_parameters(instances, modes, 1)[0]
+        for instance, output in zip(instances, outputs):
+            self.outputs[instance].append(int(output))
+        self.pc[instances] += 2
+
+    def op_5(self, instances, modes):
+        """Jump-if-True Operation"""
+        parameter1 = self.get_parameters(instances, modes, 1)[0]
+        self.jump(instances, modes, parameter1 != 0)
+
+    def op_6(self, instances, modes):
+        """Jump-if-False Operation"""
+        parameter1 = self.get_parameters(instances, modes, 1)[0]
+        self.jump(instances, modes, parameter1 == 0)
+
+    def jump(self, instances, modes, taken):
+        """Moves the program counter of each of the given instances to its jump's
+        destination if its jump is taken (a boolean vector), or past the jump if
+        not. Destinations are only read for the jumps that are taken.
+        """
+        jumping = instances[taken]
+        if len(jumping):
+            self.pc[jumping] = self.get_parameters(jumping, modes, 2)[1]
+        self.pc[instances[~taken]] += 3
+
+    def op_7(self, instances, modes):
+        """Less Than Operation"""
+        parameter1, parameter2 = self.get_parameters(instances, modes, 2)
+        output_registers = self.set_parameter(instances, modes, 3)
+        self.memory[instances, output_registers] = parameter1 < parameter2
+        self.pc[instances] += 4
+
+    def op_8(self, instances, modes):
+        """Equals Operation"""
+        parameter1, parameter2 = self.get_parameters(instances, modes, 2)
+        output_registers = self.set_parameter(instances, modes, 3)
+        self.memory[instances, output_registers] = parameter1 == parameter2
+        self.pc[instances] += 4
+
+    def op_9(self, instances, modes):
+        """Adjust Relative Base Operation"""
+        self.relative_base[instances] += self.get_parameters(instances, modes, 1)[0]
+        self.pc[instances] += 2
+
+def check_addresses(addresses):
+    """Raises IndexError if any of the given addresses is negative (rather than
+    letting NumPy index from the end of memory, which IntcodeComputer doesn't).
+    """
+    if (addresses < 0).any():
+        raise IndexError('negative address: {}'.format(addresses.min()))
+
+def test():
+    """Checks that each instance of a batch produces the same outputs as the
+    scalar interpreter does for the same inputs.
+    """
+    from .IntcodeComputer import run
+
+    # day 5: outputs 999, 1000 or 1001 as the input is below, equal to or above 8,
+    # so the instances' control flow diverges
+    program = [3, 21, 1008, 21, 8, 20, 1005, 20, 22, 107, 8, 21, 20, 1006, 20, 31,
+               1106, 0, 36, 98, 0, 0, 1002, 21, 125, 20, 4, 20, 1105, 1, 46, 104,
+               999, 1105, 1, 46, 1101, 1000, 1, 20, 4, 20, 1105, 1, 46, 98, 99]
+    inputs = list(range(16))
+    batch = BatchComputer(program, len(inputs))
+    batch.send(inputs)
+    batch.run()
+    assert batch.halted.all()
+    for value, outputs in zip(inputs, batch.outputs):
+        expected = []
+        run(program, [value], expected)
+        assert outputs == expected, value
+    assert batch.outputs[7] == [999] and batch.outputs[8] == [1000] and batch.outputs[9] == [1001]
+
+    # day 9: a quine, using relative mode and memory past the end of the program
+    program = [109, 1, 204, -1, 1001, 100, 1, 100, 1008, 100, 16, 101, 1006, 101, 0, 99]
+    batch = BatchComputer(program, 2, memory_size=128)
+    batch.run()
+    assert batch.outputs == [program, program]
+
+    # instances wait for input until it's sent, and a budget stops the run early
+    batch = BatchComputer([3, 7, 4, 7, 99, 0, 0, 0], 3)
+    batch.send([5], [1])
+    assert batch.run(max_steps=1) == 1
+    batch.run()
+    assert list(batch.halted) == [False, True, False] and list(batch.waiting) == [True, False, True]
+    assert batch.outputs == [[], [5], []]
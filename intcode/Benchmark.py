@@ -0,0 +1,272 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import importlib.util
+from itertools import permutations
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+from .Arguments import Arguments
+from .IntcodeComputer import IntcodeComputer, load
+from .Trace import Trace
+
+# the root of the repo, which holds the puzzle drivers that the workloads run
+REPO_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# the puzzle programs that the workloads run
+PROGRAMS_DIRECTORY = os.path.join(REPO_DIRECTORY, 'IntcodePrograms')
+
+# stored results of a previous benchmark run, that later runs are compared to
+BASELINE_FILENAME = os.path.join(PROGRAMS_DIRECTORY, 'benchmark_baseline.json')
+
+# default fraction by which a run may be slower (or use more memory) than the
+# baseline before it's considered a regression
+THRESHOLD = 0.10
+
+def load_program(filename):
+    return load(os.path.join(PROGRAMS_DIRECTORY, filename))
+
+#############################
+######### Workloads #########
+#############################
+
+# Each workload runs one of the puzzle drivers (in the day directories of the
+# repo) with computers created by create(program, input_channel,
+# output_channel), and returns the puzzle's answer (so that a faster but wrong
+# interpreter doesn't go unnoticed).
+
+@lru_cache(maxsize=None)
+def load_driver(path):
+    """Imports a puzzle driver, given its path from the root of the repo (e.g.
+    'day13/day13_2.py').
+    """
+    filename = os.path.join(REPO_DIRECTORY, path)
+    name = os.path.splitext(os.path.basename(filename))[0]
+    spec = importlib.util.spec_from_file_location(name, filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def program_filename(filename):
+    return os.path.join(PROGRAMS_DIRECTORY, filename)
+
+def boost(create):
+    """Day 9: run the BOOST program in sensor boost mode."""
+    day9 = load_driver('_day9/day9_2.py')
+    return day9.run_boost(program_filename('9.in'), 2, create)[-1]
+
+def arcade(create):
+    """Day 13: play the arcade game to the end, moving the paddle towards the
+    ball, and return the final score.
+    """
+    day13 = load_driver('day13/day13_2.py')
+    return day13.run_game(program_filename('13.in'), create, draw=False)
+
+def maze(create):
+    """Day 15: explore the whole maze with the repair droid, and return the
+    length of the shortest path to the oxygen system.
+    """
+    day15 = load_driver('day15/day15_1.py')
+    graph, oxygen_location = day15.run_droid(program_filename('15.in'), create)
+    return day15.shortest_path_to_oxygen(graph, oxygen_location)
+
+def amplifiers(create):
+    """Day 7: find the highest thruster signals for every phase setting sequence,
+    both for a chain of amplifiers and for a feedback loop of amplifiers.
+    """
+    day7_1 = load_driver('_day7/day7_1.py')
+    day7_2 = load_driver('_day7/day7_2.py')
+    program = load_program('7.in')
+    chain = max(day7_1.run_amplifiers(program, phases, create)
+                for phases in permutations(range(5)))
+    loop = max(day7_2.run_amplifiers(program_filename('7.in'), phases, True, create)
+               for phases in permutations(range(5, 10)))
+    return [chain, loop]
+
+def hull(create):
+    """Day 11: run the hull painting robot, starting on a black panel, and return
+    the number of panels that it paints at least once.
+    """
+    day11 = load_driver('day11/PaintingRobot.py')
+    return day11.PaintingRobot(load_program('11.in'), create=create).run().painted
+
+def ascii(create):
+    """Day 17: move the vacuum robot along the whole scaffold, and return the
+    amount of dust that it collects.
+    """
+    day17 = load_driver('day17/day17_2.py')
+    return day17.run_robot(program_filename('17-2.in'), create)
+
+WORKLOADS = {'boost': boost,
+             'arcade': arcade,
+             'maze': maze,
+             'amplifiers': amplifiers,
+             'hull': hull,
+             'ascii': ascii}
+
+#############################
+######### Measuring #########
+#############################
+
+def count_instructions(workload):
+    """Runs a workload with plain computers, and returns the total number of
+    instructions that they execute (which doesn't depend on the interpreter's
+    options, since the inputs are scripted). The plain interpreter takes one
+    step per instruction, not counting halts.
+    """
+    computers = []
+    def create(program, input_channel=None, output_channel=None):
+        computer = IntcodeComputer(program, input_channel, output_channel)
+        computers.append(computer)
+        return computer
+
+    workload(create)
+    return sum(computer.steps for computer in computers)
+
+def measure(name, options, repeat):
+    """Measures a single workload. Each workload is measured in a fresh worker
+    process, so that its peak RSS isn't hidden by earlier workloads.
+    """
+    workload = WORKLOADS[name]
+    def create(program, input_channel=None, output_channel=None):
+        return IntcodeComputer(program, input_channel, output_channel, **options)
+
+    # keep the fastest of the timed runs
+    wall_time = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = workload(create)
+        wall_time = min(wall_time, time.perf_counter() - start)
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss # in KiB
+
+    # the most memory that Python had allocated at once during the run (as
+    # traced by tracemalloc, which slows the run down, so it's done separately);
+    # this is a size in bytes, not a count of allocations
+    tracemalloc.start()
+    workload(create)
+    _, peak_traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    instructions = count_instructions(workload)
+
+    return {'result': result,
+            'instructions': instructions,
+            'wall_time': wall_time,
+            'instructions_per_second': instructions / wall_time,
+            'peak_rss_kib': peak_rss,
+            'peak_traced_bytes': peak_traced}
+
+def record_traces(name, directory):
+    """Runs a workload, and writes a trace of each of its computers' runs to
+    the given directory (as <workload>.<n>.trace), so that the computers can be
+    replayed and timed without the workload's controller.
+    """
+    traces = []
+    def create(program, input_channel=None, output_channel=None):
+        computer = IntcodeComputer(program, input_channel, output_channel)
+        traces.append(Trace.record(computer))
+        return computer
+
+    WORKLOADS[name](create)
+    for i, trace in enumerate(traces):
+        trace.write(os.path.join(directory, '{}.{}.trace'.format(name, i)))
+    return len(traces)
+
+def compare(name, measurement, baseline, threshold):
+    """Returns a description of each way in which a measurement has regressed
+    compared to the baseline.
+    """
+    regressions = []
+    if measurement['result'] != baseline['result']:
+        regressions.append('{}: result changed from {} to {}'.format(
+            name, baseline['result'], measurement['result']))
+    if measurement['instructions'] != baseline['instructions']:
+        regressions.append('{}: executed {} instructions instead of {}'.format(
+            name, measurement['instructions'], baseline['instructions']))
+
+    for key in ['wall_time', 'peak_rss_kib', 'peak_traced_bytes']:
+        # (baselines saved before a measurement was added don't have it)
+        if key in baseline and measurement[key] > baseline[key] * (1 + threshold):
+            regressions.append('{}: {} regressed by {:.1%} ({} -> {})'.format(
+                name, key, measurement[key] / baseline[key] - 1,
+                baseline[key], measurement[key]))
+
+    return regressions
+
+def main():
+    """When called from the command line, run the benchmarks and compare them to
+    the stored baseline, exiting with a non-zero status if any have regressed.
+
+    Usage: python3 -m intcode benchmark [workload ...] [--save-baseline] [--baseline FILE]
+                                           [--threshold FRACTION] [--repeat N]
+                                           [--compile-blocks] [--fuse-instructions]
+                                           [--paged-memory] [--compile-program]
+                                           [--record-traces DIRECTORY]
+    """
+    arguments = Arguments()
+    baseline_filename = arguments.option('--baseline', BASELINE_FILENAME)
+    threshold = float(arguments.option('--threshold', THRESHOLD))
+    repeat = int(arguments.option('--repeat', 3))
+    traces_directory = arguments.option('--record-traces')
+    save_baseline = arguments.switch('--save-baseline')
+    options = {'compile_blocks': arguments.switch('--compile-blocks'),
+               'fuse_instructions': arguments.switch('--fuse-instructions'),
+               'paged_memory': arguments.switch('--paged-memory'),
+               'compile_program': arguments.switch('--compile-program')}
+    names = arguments.args or list(WORKLOADS)
+
+    if traces_directory is not None:
+        os.makedirs(traces_directory, exist_ok=True)
+        for name in names:
+            print('{:<12} {} traces recorded'.format(name, record_traces(name, traces_directory)))
+        return
+
+    measurements = {}
+    for name in names:
+        # a new worker process for each workload
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            measurement = executor.submit(measure, name, options, repeat).result()
+        measurements[name] = measurement
+        print('{:<12} {:>12,} instructions {:>8.3f}s {:>12,.0f} instructions/s '
+              '{:>8,} KiB peak RSS {:>12,} bytes peak traced memory'.format(
+                  name, measurement['instructions'], measurement['wall_time'],
+                  measurement['instructions_per_second'], measurement['peak_rss_kib'],
+                  measurement['peak_traced_bytes']))
+
+    if save_baseline:
+        baseline = {'options': options, 'workloads': {}}
+        if os.path.exists(baseline_filename):
+            with open(baseline_filename) as f:
+                baseline = json.load(f)
+        baseline['options'] = options
+        baseline['workloads'].update(measurements)
+        with open(baseline_filename, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print('Saved baseline to {}'.format(baseline_filename))
+        return
+
+    if not os.path.exists(baseline_filename):
+        print('No baseline to compare to; run with --save-baseline to store one')
+        return
+
+    with open(baseline_filename) as f:
+        baseline = json.load(f)
+    if baseline['options'] != options:
+        print('Warning: the baseline was measured with options {}'.format(baseline['options']))
+
+    regressions = []
+    for name, measurement in measurements.items():
+        if name in baseline['workloads']:
+            regressions.extend(compare(name, measurement, baseline['workloads'][name],
+                                       threshold))
+
+    for regression in regressions:
+        print(regression)
+    if regressions:
+        sys.exit(1)
+    print('No regressions beyond {:.0%} of the baseline'.format(threshold))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+from .Disassembler import decode
+
+# operations that can be part of a compiled block; inputs, outputs and halts are
+# left to the interpreter
+COMPILABLE_OPERATIONS = {1, 2, 5, 6, 7, 8, 9}
+
+class BlockCompiler():
+    """Compiles hot basic blocks of an Intcode program into Python functions.
+
+    A basic block is a run of straight-line instructions (additions,
+    multiplications, comparisons and relative base adjustments) that ends with a
+    jump, or just before an input, output or halt instruction. Once execution
+    has reached the start of a block HOT_THRESHOLD times, the block is translated
+    into the source code of a single Python function, which is compiled once and
+    cached by its start address. Each compiled function takes the computer's
+    memory and relative base, and returns the next program counter along with
+    the updated relative base.
+
+    Any write into the address range of a compiled block discards that block, so
+    self-modifying programs still behave correctly. Programs compiled by the
+    Intcode compiler often patch the parameters of their own instructions (e.g. to
+    index into an array), so once a parameter has been overwritten, it's marked as
+    volatile: later compilations read it from memory at runtime rather than
+    treating it as a constant, and writes to it no longer discard the block.
+    """
+
+    # number of times that execution must reach an address before the block that
+    # starts there is compiled
+    HOT_THRESHOLD = 8
+
+    def __init__(self, computer):
+        self.computer = computer
+
+        # compiled functions, keyed by the start address of their block
+        self.compiled = {}
+        # the addresses covered by each compiled block
+        self.block_addresses = {}
+        # the start addresses of the compiled blocks covering each address
+        self.covered = {}
+        # the number of times that execution has reached each uncompiled address
+        self.hits = {}
+        # addresses that have been overwritten while covered by a compiled block
+        self.volatile = set()
+
+    def lookup(self, address):
+        """Returns the compiled function for the block starting at address,
+        compiling the block first if it has become hot. Returns None if the block
+        isn't hot yet, or if there's no block to compile at that address.
+        """
+        function = self.compiled.get(address)
+        if function is not None:
+            return function
+
+        hits = self.hits.get(address, 0) + 1
+        self.hits[address] = hits
+        if hits < self.HOT_THRESHOLD:
+            return None
+
+        return self.compile(address)
+
+    def invalidate(self, address):
+        """Discards the compiled blocks that depend on the value at the given
+        address. (IntcodeComputer.invalidate() calls this, after discarding the
+        rest of the code that depends on it.)
+        """
+        for start in self.covered.pop(address, ()):
+            self.volatile.add(address)
+            del self.compiled[start]
+            for covered_address in self.block_addresses.pop(start):
+                if covered_address == address:
+                    continue
+                starts = self.covered[covered_address]
+                starts.discard(start)
+                if not starts:
+                    del self.covered[covered_address]
+            # start counting again, in case the block becomes hot again
+            self.hits[start] = 0
+
+    def clear(self):
+        """Discards all compiled blocks (e.g. after the computer's memory has
+        been replaced).
+        """
+        self.compiled.clear()
+        self.block_addresses.clear()
+        self.covered.clear()
+        self.hits.clear()
+        self.volatile.clear()
+
+    def compile(self, start):
+        """Compiles the block starting at the given address, and caches it.
+        Returns None if there are no instructions to compile at that address.
+        """
+        lines, addresses = self.generate(start)
+
+        if not addresses:
+            # mark the address so that it isn't counted again
+            self.hits[start] = float('-inf')
+            return None
+
+        source = 'def block_{}(m, rb):\n'.format(start) + '\n'.join(lines) + '\n'
+        namespace = {'fused': self.computer.fused_sites,
+                     'covered': self.covered,
+                     'invalidate': self.computer.invalidate}
+        exec(compile(source, '<intcode block {}>'.format(start), 'exec'), namespace)
+        function = namespace['block_{}'.format(start)]
+
+        self.compiled[start] = function
+        self.block_addresses[start] = addresses
+        for address in addresses:
+            self.covered.setdefault(address, set()).add(start)
+
+        return function
+
+    def generate(self, start):
+        """Generates the body of the function for the block starting at the given
+        address. Returns the lines of the body, along with the addresses that the
+        compiled code depends on.
+        """
+        memory = self.computer.program
+        lines = []
+        addresses = []
+        # constant addresses written to by the block so far
+        written = set()
+        # counter used to name temporary variables
+        self.temporaries = 0
+
+        address = start
+        while True:
+            instruction = decode(memory, address)
+            if instruction is None or instruction.operation not in COMPILABLE_OPERATIONS:
+                break
+
+            operation = instruction.operation
+            modes = instruction.modes
+            next_address = address + instruction.length
+
+            # volatile parameters are read from memory at runtime, so only the
+            # opcode and the remaining parameters need to stay unchanged
+            instruction_addresses = [address]
+            parameters = []
+            for parameter_address, parameter in zip(range(address + 1, next_address),
+                                                    instruction.parameters):
+                if parameter_address in self.volatile:
+                    parameters.append('m[{}]'.format(parameter_address))
+                else:
+                    instruction_addresses.append(parameter_address)
+                    parameters.append(parameter)
+
+            # if an earlier instruction in the block overwrites this one, end the
+            # block so that the new instruction is executed instead
+            if any(a in written for a in instruction_addresses):
+                break
+
+            addresses.extend(instruction_addresses)
+            source = ','.join(map(str, [instruction.opcode] + parameters))
+            lines.append('    # {}: {}'.format(address, source))
+
+            # jumps end the block
+            if operation in (5, 6):
+                value = self.generate_read(lines, modes[0], parameters[0])
+                comparison = '!=' if operation == 5 else '=='
+                lines.append('    if {} {} 0:'.format(value, comparison))
+                # the destination is only read if the jump is taken
+                destination = self.generate_read(lines, modes[1], parameters[1], '        ')
+                lines.append('        return {}, rb'.format(destination))
+                lines.append('    return {}, rb'.format(next_address))
+                return lines, addresses
+
+            # relative base adjustment
+            if operation == 9:
+                value = self.generate_read(lines, modes[0], parameters[0])
+                lines.append('    rb += {}'.format(value))
+
+            # additions, multiplications and comparisons
+            else:
+                value1 = self.generate_read(lines, modes[0], parameters[0])
+                value2 = self.generate_read(lines, modes[1], parameters[1])
+                if operation == 1:
+                    value = '{} + {}'.format(value1, value2)
+                elif operation == 2:
+                    value = '{} * {}'.format(value1, value2)
+                elif operation == 7:
+                    value = '1 if {} < {} else 0'.format(value1, value2)
+                elif operation == 8:
+                    value = '1 if {} == {} else 0'.format(value1, value2)
+
+                if modes[2] == 0 and isinstance(parameters[2], int):
+                    self.generate_write(lines, parameters[2], value)
+                    written.add(parameters[2])
+                else:
+                    generate_dynamic_write(lines, modes[2], parameters[2], value,
+                                           next_address)
+
+            address = next_address
+
+        lines.append('    return {}, rb'.format(address))
+        return lines, addresses
+
+    def generate_read(self, lines, mode, parameter, indent='    '):
+        """Returns an expression for the value of a "get" parameter (see
+        generate_read() below).
+        """
+        self.temporaries += 1
+        return generate_read(lines, indent, mode, parameter, len(self.computer.program),
+                             't{}'.format(self.temporaries))
+
+    def generate_write(self, lines, address, value):
+        """Adds statements that write value to a constant (position mode) address."""
+        if 0 <= address < len(self.computer.program):
+            lines.append('    m[{}] = {}'.format(address, value))
+        else:
+            lines.append('    m.write({}, {})'.format(address, value))
+
+        lines.append('    if {0} in fused or {0} in covered:'.format(address))
+        lines.append('        invalidate({})'.format(address))
+
+def generate_read(lines, indent, mode, parameter, program_size, temporary):
+    """Returns an expression for the value of a "get" parameter, adding any
+    statements that are needed to compute it to lines (at the given indent). The
+    parameter is either a constant, or an expression for a volatile parameter.
+    An address that isn't known until runtime is read into the given temporary
+    variable, since it may be past the end of the memory list (whose size, when
+    the code is generated, is program_size).
+    """
+    # immediate mode
+    if mode == 1:
+        return str(parameter)
+
+    if mode == 0 and isinstance(parameter, int):
+        # position mode, with an address inside the memory list
+        if 0 <= parameter < program_size:
+            return 'm[{}]'.format(parameter)
+        # position mode, with an address past the end of the memory list
+        return 'm.read({})'.format(parameter)
+
+    # relative mode or volatile position mode
+    address = parameter if mode == 0 else 'rb + {}'.format(parameter)
+    lines.append('{}{} = {}'.format(indent, temporary, address))
+    generate_address_check(lines, indent, temporary)
+    lines.append('{}try:'.format(indent))
+    lines.append('{}    {} = m[{}]'.format(indent, temporary, temporary))
+    lines.append('{}except IndexError:'.format(indent))
+    lines.append('{}    {} = m.read({})'.format(indent, temporary, temporary))
+    return temporary
+
+def generate_address_check(lines, indent, variable):
+    """Adds statements that reject a negative address (in the given variable)
+    before memory is indexed with it, since indexing the memory list with a
+    negative index would wrap around to its end.
+    """
+    lines.append('{}if {} < 0:'.format(indent, variable))
+    lines.append("{}    raise IndexError('negative address: {{}}'.format({}))".format(
+        indent, variable))
+
+def generate_dynamic_write(lines, mode, parameter, value, next_address):
+    """Adds statements that write value to an address that isn't known until
+    runtime (relative mode, or volatile position mode). If the write lands on
+    cached code, the function that's being generated returns next_address
+    straight away, since the rest of it may no longer be valid.
+    """
+    address = parameter if mode == 0 else 'rb + {}'.format(parameter)
+    lines.append('    a = {}'.format(address))
+    generate_address_check(lines, '    ', 'a')
+    lines.append('    try:')
+    lines.append('        m[a] = {}'.format(value))
+    lines.append('    except IndexError:')
+    lines.append('        m.write(a, {})'.format(value))
+    lines.append('    if a in fused or a in covered:')
+    lines.append('        invalidate(a)')
+    lines.append('        return {}, rb'.format(next_address))
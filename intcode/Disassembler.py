@@ -0,0 +1,305 @@
+from collections import namedtuple
+import json
+import sys
+
+# each operation's mnemonic, along with the number of parameters that it takes
+OPERATIONS = {1: ('add', 3),
+              2: ('mul', 3),
+              3: ('in', 1),
+              4: ('out', 1),
+              5: ('jnz', 2),
+              6: ('jz', 2),
+              7: ('lt', 3),
+              8: ('eq', 3),
+              9: ('arb', 1),
+              99: ('hlt', 0)}
+
+# operations whose last parameter is the address that they write to
+WRITING_OPERATIONS = {1, 2, 3, 7, 8}
+
+# operations that (may) transfer control somewhere other than the next instruction
+JUMP_OPERATIONS = {5, 6}
+
+Instruction = namedtuple('Instruction', ['address', 'opcode', 'operation', 'mnemonic',
+                                         'modes', 'parameters', 'length'])
+
+def decode(program, address):
+    """Decodes the instruction at the given address of a program (a list, or an
+    IntcodeComputer's memory). Returns None if there isn't a valid instruction
+    there.
+    """
+    if not 0 <= address < len(program):
+        return None
+
+    opcode = program[address]
+    operation = opcode % 100
+    if opcode < 0 or operation not in OPERATIONS:
+        return None
+
+    mnemonic, n = OPERATIONS[operation]
+    modes = tuple(opcode // 10 ** (i + 1) % 10 for i in range(1, n + 1))
+    if any(mode > 2 for mode in modes):
+        return None
+    # writes can't use immediate mode
+    if operation in WRITING_OPERATIONS and modes[-1] == 1:
+        return None
+
+    parameters = tuple(program[address + i] if address + i < len(program) else 0
+                       for i in range(1, n + 1))
+
+    return Instruction(address, opcode, operation, mnemonic, modes, parameters, n + 1)
+
+def format_instruction(instruction):
+    """Returns an assembly-like representation of an instruction, e.g.
+    "add [rb+3], 1, [100]"
+    """
+    operands = []
+    for mode, parameter in zip(instruction.modes, instruction.parameters):
+        # position mode
+        if mode == 0:
+            operands.append('[{}]'.format(parameter))
+        # immediate mode
+        elif mode == 1:
+            operands.append(str(parameter))
+        # relative mode
+        elif mode == 2:
+            operands.append('[rb{:+d}]'.format(parameter))
+
+    return '{} {}'.format(instruction.mnemonic, ', '.join(operands)).rstrip()
+
+def successors(instruction):
+    """Returns the addresses that control may pass to after an instruction, along
+    with whether the instruction is an indirect jump (i.e. a jump whose
+    destination isn't known until runtime).
+    """
+    next_address = instruction.address + instruction.length
+
+    if instruction.operation == 99:
+        return [], False
+
+    if instruction.operation not in JUMP_OPERATIONS:
+        return [next_address], False
+
+    (condition_mode, destination_mode) = instruction.modes
+    condition, destination = instruction.parameters
+
+    addresses = []
+    indirect = destination_mode != 1
+    if not indirect:
+        addresses.append(destination)
+
+    # a jump with an immediate condition is either always or never taken
+    if condition_mode == 1:
+        always_taken = (condition != 0) == (instruction.operation == 5)
+        if always_taken:
+            return addresses, indirect
+        return [next_address], False
+
+    addresses.append(next_address)
+    return addresses, indirect
+
+class BasicBlock():
+    """A run of instructions that is always executed from start to end."""
+
+    def __init__(self, start):
+        self.start = start
+        self.instructions = []
+        self.successors = []
+        self.predecessors = []
+        # whether the block ends with a jump whose destination isn't known statically
+        self.indirect_jump = False
+        # whether another instruction writes into this block's instructions
+        self.self_modified = False
+
+    @property
+    def end(self):
+        """The address just past the end of the block."""
+        last = self.instructions[-1]
+        return last.address + last.length
+
+    def to_dict(self):
+        return {'start': self.start,
+                'end': self.end,
+                'instructions': [instruction.address for instruction in self.instructions],
+                'successors': self.successors,
+                'predecessors': self.predecessors,
+                'indirect_jump': self.indirect_jump,
+                'self_modified': self.self_modified}
+
+class Disassembler():
+    """Statically analyzes an Intcode program without running it.
+
+    Instructions are found by following control flow from the entry points,
+    rather than by sweeping linearly, so that data isn't decoded as code. Jumps
+    whose destinations come from memory (e.g. returns from subroutines) can't be
+    followed statically; they are flagged as indirect jumps instead. Since
+    compiled Intcode programs push return addresses as constants before calling
+    a subroutine, constants that are written to memory and point at valid
+    instructions are also treated as entry points (unless infer_entry_points is
+    False).
+
+    The instructions are then split into basic blocks, which are linked into a
+    control-flow graph. Writes to constant addresses that land on instructions
+    (self-modifying code) are flagged, along with the blocks that they modify;
+    the remaining blocks are safe to optimize.
+    """
+
+    def __init__(self, program, entry_points=(0,), infer_entry_points=True):
+        self.program = program
+
+        # decoded instructions, keyed by address
+        self.instructions = {}
+        # basic blocks, keyed by their start address
+        self.blocks = {}
+        # addresses of jumps whose destinations aren't known statically
+        self.indirect_jumps = []
+        # (instruction address, written address) for writes that land on code
+        self.self_modifying_writes = []
+        # addresses that control can reach, but that don't hold a valid instruction
+        self.invalid_addresses = set()
+
+        self.entry_points = set(entry_points)
+        self.trace(entry_points)
+        if infer_entry_points:
+            # newly decoded code may push further return addresses
+            addresses = self.inferred_entry_points()
+            while addresses:
+                self.trace(addresses)
+                addresses = self.inferred_entry_points()
+
+        self.build_blocks()
+        self.find_self_modifying_writes()
+
+    def trace(self, addresses):
+        """Decodes all of the instructions reachable from the given addresses."""
+        worklist = list(addresses)
+        while worklist:
+            address = worklist.pop()
+            if address in self.instructions or address in self.invalid_addresses:
+                continue
+
+            instruction = decode(self.program, address)
+            if instruction is None:
+                self.invalid_addresses.add(address)
+                continue
+            self.instructions[address] = instruction
+
+            next_addresses, indirect = successors(instruction)
+            if indirect:
+                self.indirect_jumps.append(address)
+            worklist.extend(next_addresses)
+
+    def inferred_entry_points(self):
+        """Returns constants written by the program that point at valid, not yet
+        decoded instructions (e.g. return addresses pushed before a call).
+        """
+        addresses = set()
+        for instruction in list(self.instructions.values()):
+            if instruction.operation not in (1, 2):
+                continue
+            if instruction.modes[0] != 1 or instruction.modes[1] != 1:
+                continue
+
+            a, b = instruction.parameters[:2]
+            constant = a + b if instruction.operation == 1 else a * b
+            if constant not in self.instructions and decode(self.program, constant):
+                addresses.add(constant)
+
+        self.entry_points.update(addresses)
+        return addresses
+
+    def build_blocks(self):
+        """Splits the decoded instructions into basic blocks and links them."""
+        # instructions that start a new block
+        leaders = set(self.entry_points)
+        for instruction in self.instructions.values():
+            if instruction.operation in JUMP_OPERATIONS or instruction.operation == 99:
+                leaders.update(successors(instruction)[0])
+                leaders.add(instruction.address + instruction.length)
+
+        block = None
+        for address in sorted(self.instructions):
+            instruction = self.instructions[address]
+
+            # start a new block at leaders, and wherever the instructions aren't
+            # contiguous (or overlap)
+            if block is None or address in leaders or address != block.end:
+                block = BasicBlock(address)
+                self.blocks[address] = block
+            block.instructions.append(instruction)
+
+            if instruction.operation in JUMP_OPERATIONS or instruction.operation == 99:
+                block = None
+
+        for block in self.blocks.values():
+            last = block.instructions[-1]
+            block.successors, block.indirect_jump = successors(last)
+            block.successors = [a for a in block.successors if a in self.blocks]
+            for successor in block.successors:
+                self.blocks[successor].predecessors.append(block.start)
+
+    def find_self_modifying_writes(self):
+        """Flags writes to constant addresses that land on decoded instructions.
+        Writes to relative addresses aren't known statically, so aren't flagged.
+        """
+        # the block containing each address that's part of an instruction
+        code = {}
+        for block in self.blocks.values():
+            for instruction in block.instructions:
+                for address in range(instruction.address, instruction.address + instruction.length):
+                    code[address] = block
+
+        for instruction in self.instructions.values():
+            if instruction.operation not in WRITING_OPERATIONS or instruction.modes[-1] != 0:
+                continue
+
+            address = instruction.parameters[-1]
+            if address in code:
+                self.self_modifying_writes.append((instruction.address, address))
+                code[address].self_modified = True
+
+    def listing(self):
+        """Returns the disassembled program as text, one basic block at a time."""
+        lines = []
+        for start in sorted(self.blocks):
+            block = self.blocks[start]
+            lines.append('block {} -> {}{}'.format(start,
+                                                   block.successors,
+                                                   ' (indirect)' if block.indirect_jump else ''))
+            for instruction in block.instructions:
+                lines.append('    {:>6}: {}'.format(instruction.address,
+                                                    format_instruction(instruction)))
+        return '\n'.join(lines)
+
+    def to_dict(self):
+        """Returns the results of the analysis as JSON-serializable data."""
+        return {'instructions': [{'address': instruction.address,
+                                  'opcode': instruction.opcode,
+                                  'mnemonic': instruction.mnemonic,
+                                  'modes': instruction.modes,
+                                  'parameters': instruction.parameters,
+                                  'text': format_instruction(instruction)}
+                                 for _, instruction in sorted(self.instructions.items())],
+                'blocks': [self.blocks[start].to_dict() for start in sorted(self.blocks)],
+                'entry_points': sorted(self.entry_points),
+                'indirect_jumps': sorted(self.indirect_jumps),
+                'self_modifying_writes': [{'instruction': instruction, 'address': address}
+                                          for instruction, address in self.self_modifying_writes],
+                'invalid_addresses': sorted(self.invalid_addresses)}
+
+def main():
+    """When called from the command line and provided with an intcode program,
+    print its disassembly (or, with --json, the full analysis as JSON).
+    """
+    # load() is imported here, since IntcodeComputer imports this module
+    from .IntcodeComputer import load
+
+    program_filename = sys.argv[1] # path to the intcode program
+    disassembler = Disassembler(load(program_filename))
+    if '--json' in sys.argv[2:]:
+        print(json.dumps(disassembler.to_dict(), indent=2))
+    else:
+        print(disassembler.listing())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+from .BlockCompiler import generate_dynamic_write, generate_read
+from .Disassembler import Disassembler
+
+# the compiled code of each superinstruction, keyed by its kind and the addresses
+# and opcodes of the instructions that it fuses, so that computers running the
+# same program (e.g. forks) only compile each superinstruction once
+compiled = {}
+
+class InstructionFuser():
+    """Replaces common pairs of instructions in an IntcodeComputer's program with
+    superinstructions, which execute both instructions in a single dispatch:
+
+        compare_jump - a Less Than/Equals Operation, followed by a
+            Jump-if-True/Jump-if-False Operation that tests its result
+        store_jump - an Addition/Multiplication Operation that writes to a
+            relative address (e.g. pushing a return address), followed by a jump
+        adjust_relative_base_jump - an Adjust Relative Base Operation, followed
+            by a jump (i.e. a return from a subroutine)
+        jump_adjust_relative_base - a jump to an immediate address, where the
+            first instruction is an Adjust Relative Base Operation (i.e. a call
+            to a subroutine)
+
+    Each superinstruction is compiled into a Python function with the same
+    interface as a compiled block (see BlockCompiler): it takes the computer's
+    memory and relative base, and returns the next program counter along with
+    the updated relative base. Unlike a block, it reads all of its parameters
+    from memory at runtime, so it only depends on the opcodes of the
+    instructions that it's made up of; writing to either of them discards it.
+    Each superinstruction also counts how often its kind is executed, in the
+    computer's fusion_counts.
+    """
+
+    def __init__(self, computer):
+        self.computer = computer
+
+    def fuse(self):
+        """Finds the pairs of instructions in the computer's program, and adds a
+        superinstruction for each pair to computer.superinstructions (and the
+        addresses of both of its opcodes to computer.fused_sites).
+        """
+        computer = self.computer
+        instructions = Disassembler(computer.program).instructions
+        namespace = {'counts': computer.fusion_counts,
+                     'fused': computer.fused_sites,
+                     'covered': {} if computer.block_compiler is None
+                                else computer.block_compiler.covered,
+                     'invalidate': computer.invalidate}
+
+        for address, first in instructions.items():
+            kind, second = self.pair(instructions, first)
+            # (the parameters of instructions at the very end of memory may not
+            # be in the memory list)
+            if kind is None or max(first.address + first.length,
+                                   second.address + second.length) > len(computer.program):
+                continue
+
+            key = (kind, address, first.opcode, second.address, second.opcode)
+            code = compiled.get(key)
+            if code is None:
+                source = '\n'.join(self.generate(kind, first, second)) + '\n'
+                code = compile(source, '<intcode superinstruction {}>'.format(address), 'exec')
+                compiled[key] = code
+            exec(code, namespace)
+
+            computer.superinstructions[address] = namespace.pop('superinstruction')
+            computer.fused_sites.setdefault(address, []).append(address)
+            computer.fused_sites.setdefault(second.address, []).append(address)
+
+    def pair(self, instructions, first):
+        """Returns the kind of superinstruction that starts with the given
+        instruction, along with its second instruction, or (None, None) if the
+        instruction doesn't start one.
+        """
+        # a call: the second instruction is at the jump's destination
+        if first.operation in (5, 6) and first.modes[1] == 1:
+            second = instructions.get(first.parameters[1])
+            if second is not None and second.operation == 9:
+                return 'jump_adjust_relative_base', second
+            return None, None
+
+        second = instructions.get(first.address + first.length)
+        if second is None or second.operation not in (5, 6):
+            return None, None
+
+        # the jump tests the value that was just written by the comparison
+        if first.operation in (7, 8) and \
+           (first.modes[2], first.parameters[2]) == (second.modes[0], second.parameters[0]):
+            return 'compare_jump', second
+        if first.operation in (1, 2) and first.modes[2] == 2:
+            return 'store_jump', second
+        if first.operation == 9:
+            return 'adjust_relative_base_jump', second
+        return None, None
+
+    def generate(self, kind, first, second):
+        """Returns the lines of the source code of the superinstruction."""
+        self.temporaries = 0
+        lines = ['def superinstruction(m, rb):',
+                 '    counts[{!r}] += 1'.format(kind)]
+
+        if kind == 'jump_adjust_relative_base':
+            condition = self.generate_read(lines, first, 0)
+            destination = self.generate_read(lines, first, 1)
+            lines.append('    if {} {} 0:'.format(condition, '==' if first.operation == 5 else '!='))
+            lines.append('        return {}, rb'.format(first.address + first.length))
+            # the jump's destination may have been changed since the program was loaded
+            lines.append('    if {} != {}:'.format(destination, second.address))
+            lines.append('        return {}, rb'.format(destination))
+            value = self.generate_read(lines, second, 0)
+            lines.append('    rb += {}'.format(value))
+            lines.append('    return {}, rb'.format(second.address + second.length))
+            return lines
+
+        # relative base adjustment
+        if first.operation == 9:
+            value = self.generate_read(lines, first, 0)
+            lines.append('    rb += {}'.format(value))
+
+        # additions, multiplications and comparisons
+        else:
+            value1 = self.generate_read(lines, first, 0)
+            value2 = self.generate_read(lines, first, 1)
+            value = {1: '{} + {}',
+                     2: '{} * {}',
+                     7: '1 if {} < {} else 0',
+                     8: '1 if {} == {} else 0'}[first.operation].format(value1, value2)
+            # if the write lands on the jump (or any other cached code), the jump
+            # is left to the interpreter
+            generate_dynamic_write(lines, first.modes[2], self.parameter(first, 2), value,
+                                   second.address)
+
+        # the destination is only read if the jump is taken
+        condition = self.generate_read(lines, second, 0)
+        lines.append('    if {} {} 0:'.format(condition, '!=' if second.operation == 5 else '=='))
+        destination = self.generate_read(lines, second, 1, '        ')
+        lines.append('        return {}, rb'.format(destination))
+        lines.append('    return {}, rb'.format(second.address + second.length))
+        return lines
+
+    def parameter(self, instruction, n):
+        """Returns an expression that reads the nth parameter (from 0) of an
+        instruction from memory at runtime.
+        """
+        return 'm[{}]'.format(instruction.address + n + 1)
+
+    def generate_read(self, lines, instruction, n, indent='    '):
+        """Returns an expression for the value of the nth "get" parameter (from
+        0) of an instruction (see BlockCompiler.generate_read()).
+        """
+        self.temporaries += 1
+        return generate_read(lines, indent, instruction.modes[n], self.parameter(instruction, n),
+                             len(self.computer.program), 't{}'.format(self.temporaries))
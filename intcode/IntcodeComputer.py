@@ -0,0 +1,1145 @@
+from collections import Counter, deque
+from functools import lru_cache
+import sys
+import time
+
+from .BlockCompiler import BlockCompiler
+from .Disassembler import WRITING_OPERATIONS
+from .InstructionFuser import InstructionFuser
+from .Profiler import Profiler
+from .ProgramCompiler import CODE_WRITTEN, UNKNOWN_ADDRESS, load_compiled_program
+from .ProgramImage import load_program
+
+class Memory(list):
+    """The memory of an IntcodeComputer, stored contiguously in a list.
+
+    Indexing the list directly is the fast path for addresses within it. Addresses
+    past the end of the list read as 0 without allocating anything. Writing past
+    the end grows the list, unless the address is so far away that growing the
+    list would waste memory; those writes go to a sparse overflow dict instead.
+    """
+
+    # writes at most this far past the end of the list grow the list; anything
+    # further away is stored in the overflow dict
+    MAX_GROWTH = 1 << 16
+
+    def __init__(self, program):
+        super().__init__(program)
+        self.overflow = {}
+
+    def read(self, address):
+        """Returns the value at any (non-negative) address."""
+        if address < 0:
+            raise IndexError('negative address: {}'.format(address))
+        if address < len(self):
+            return self[address]
+        return self.overflow.get(address, 0)
+
+    def write(self, address, value):
+        """Stores a value at any (non-negative) address."""
+        if address < 0:
+            raise IndexError('negative address: {}'.format(address))
+
+        size = len(self)
+        if address < size:
+            self[address] = value
+        elif address < size + self.MAX_GROWTH:
+            # at least double the size of the list so that growing it is amortized
+            self.extend([0] * (max(address + 1, 2 * size) - size))
+            self[address] = value
+
+            # move any overflow values that are now covered by the list into it
+            for overflow_address in [a for a in self.overflow if a < len(self)]:
+                self[overflow_address] = self.overflow.pop(overflow_address)
+        else:
+            self.overflow[address] = value
+
+    def copy(self):
+        """Returns a copy of this memory, including its overflow values."""
+        memory = Memory(self)
+        memory.overflow = self.overflow.copy()
+        return memory
+
+class PagedMemory():
+    """The memory of an IntcodeComputer, split into fixed-size pages that are
+    shared between copies. Copying the memory only copies the list of pages;
+    each copy then copies a page the first time that it writes to it, so many
+    variants of a program (e.g. in a search) only use memory in proportion to
+    what each of them modifies.
+
+    It supports the same interface as Memory (indexing, read(), write(), copy()
+    and len()), so the computer treats them the same way. Indexing goes through
+    Python methods rather than straight to a list, so execution is slower than
+    with Memory; it's worth it when cloning dominates.
+    """
+
+    PAGE_SHIFT = 8
+    PAGE_SIZE = 1 << PAGE_SHIFT
+    PAGE_MASK = PAGE_SIZE - 1
+
+    # writes at most this many pages past the last page add pages; anything
+    # further away is stored in the overflow dict
+    MAX_GROWTH_PAGES = Memory.MAX_GROWTH >> PAGE_SHIFT
+
+    # shared by every page that hasn't been written to yet
+    ZERO_PAGE = (0,) * PAGE_SIZE
+
+    def __init__(self, program=()):
+        program = list(program)
+        self.size = len(program)
+        self.pages = []
+        # whether each page belongs to this memory alone (and can be written to
+        # in place), or may be shared with copies
+        self.owned = []
+        for start in range(0, len(program), self.PAGE_SIZE):
+            page = program[start:start + self.PAGE_SIZE]
+            page.extend([0] * (self.PAGE_SIZE - len(page)))
+            self.pages.append(page)
+            self.owned.append(True)
+        self.overflow = {}
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, address):
+        if address < 0:
+            raise IndexError('negative address: {}'.format(address))
+        return self.pages[address >> self.PAGE_SHIFT][address & self.PAGE_MASK]
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __setitem__(self, address, value):
+        # writes past the end (or to shared pages) go through write(), which
+        # keeps track of the size
+        if 0 <= address < self.size and self.owned[address >> self.PAGE_SHIFT]:
+            self.pages[address >> self.PAGE_SHIFT][address & self.PAGE_MASK] = value
+        else:
+            self.write(address, value)
+
+    def __eq__(self, other):
+        if isinstance(other, PagedMemory):
+            other = other.tolist()
+        return self.tolist() == other
+
+    def tolist(self):
+        """Returns the values at addresses up to len(self), as a list."""
+        values = []
+        for page in self.pages:
+            values.extend(page)
+        return values[:self.size]
+
+    def read(self, address):
+        """Returns the value at any (non-negative) address."""
+        if address < 0:
+            raise IndexError('negative address: {}'.format(address))
+        page = address >> self.PAGE_SHIFT
+        if page < len(self.pages):
+            return self.pages[page][address & self.PAGE_MASK]
+        return self.overflow.get(address, 0)
+
+    def write(self, address, value):
+        """Stores a value at any (non-negative) address, copying its page first
+        if it's shared.
+        """
+        if address < 0:
+            raise IndexError('negative address: {}'.format(address))
+
+        page = address >> self.PAGE_SHIFT
+        count = len(self.pages)
+        if page >= count + self.MAX_GROWTH_PAGES:
+            self.overflow[address] = value
+            return
+
+        if page >= count:
+            # new pages start out as the shared zero page, so only the written
+            # page is allocated
+            self.pages.extend([self.ZERO_PAGE] * (page + 1 - count))
+            self.owned.extend([False] * (page + 1 - count))
+
+            # move any overflow values that are now covered by the pages into them
+            limit = len(self.pages) << self.PAGE_SHIFT
+            for overflow_address in [a for a in self.overflow if a < limit]:
+                self.write(overflow_address, self.overflow.pop(overflow_address))
+
+        if not self.owned[page]:
+            self.pages[page] = list(self.pages[page])
+            self.owned[page] = True
+        self.pages[page][address & self.PAGE_MASK] = value
+        self.size = max(self.size, address + 1)
+
+    def copy(self):
+        """Returns a copy of this memory, which shares all of its pages. Both
+        memories copy a shared page before writing to it.
+        """
+        memory = PagedMemory()
+        memory.size = self.size
+        memory.pages = list(self.pages)
+        memory.owned = [False] * len(self.pages)
+        self.owned = [False] * len(self.pages)
+        memory.overflow = self.overflow.copy()
+        return memory
+
+@lru_cache(maxsize=1024)
+def parameter_modes(opcode, n):
+    """Returns the modes of an opcode's n parameters, in order, as strings. Only
+    the opcode's value matters, so the result is cached by it rather than by the
+    address of the instruction, and never has to be invalidated.
+    """
+    # pad opcode with zeros to determine parameter modes easier, then get
+    # parameter modes in order by moving backwards across the string
+    padded_opcode = str(opcode).zfill(2 + n)
+    return tuple(padded_opcode[-2 - i] for i in range(1, n + 1))
+
+def input_reader(channel):
+    """Returns a function that takes no arguments and returns the next input
+    value from the given channel, which may be:
+        None - read a line from stdin
+        a callable - call it to get each value
+        a deque - pop values from its left end
+        any other iterable - take values from it in order
+    """
+    if channel is None:
+        return lambda: int(input())
+    if callable(channel):
+        return channel
+    if hasattr(channel, 'popleft'):
+        return channel.popleft
+    iterator = iter(channel)
+    return lambda: next(iterator)
+
+def output_writer(channel):
+    """Returns a function that takes a single output value and sends it to the
+    given channel, which may be:
+        None - print it to stdout
+        a callable - call it with each value
+        a list, deque, etc. - append each value to it
+    """
+    if channel is None:
+        return print
+    if callable(channel):
+        return channel
+    return channel.append
+
+# statuses returned by IntcodeComputer.run(); NEEDS_INPUT is also yielded by
+# IntcodeComputer.run_iter() when the program is waiting for input
+HALTED = 'HALTED'
+NEEDS_INPUT = 'NEEDS_INPUT'
+OUTPUT_READY = 'OUTPUT_READY'
+BUDGET_EXHAUSTED = 'BUDGET_EXHAUSTED'
+
+class IntcodeComputer():
+    """An implementation of the Intcode Computer described in Advent of Code 2019."""
+
+    # computers are created in large numbers (e.g. when forking or sweeping), so
+    # their attributes are fixed rather than kept in a per-instance dict
+    __slots__ = ('program', 'read_input', 'write_output', 'pc', 'jump_table',
+                 'relative_base', 'current_modes', 'halted', 'steps',
+                 'trace', 'block_compiler', 'fusion_counts', 'superinstructions',
+                 'fused_sites', 'profiler',
+                 'compiled_program')
+
+    def __init__(self, program, input_channel=None, output_channel=None,
+                 compile_blocks=False, fuse_instructions=False, profile=False,
+                 paged_memory=False, compile_program=False):
+        # memory beyond the initial program starts with the value 0; a program
+        # given as PagedMemory is cloned, sharing its pages until they're written
+        if isinstance(program, PagedMemory):
+            self.program = program.copy()
+        elif paged_memory:
+            self.program = PagedMemory(program)
+        else:
+            self.program = Memory(program)
+
+        # by default, input is read from stdin and output is printed to stdout;
+        # other channels let a program be driven from within the same process
+        self.read_input = input_reader(input_channel)
+        self.write_output = output_writer(output_channel)
+
+        self.pc = 0 # program counter
+        # each operation, along with the number of parameters that it takes
+        self.jump_table = {1: (self.op_1, 3),
+                           2: (self.op_2, 3),
+                           3: (self.op_3, 1),
+                           4: (self.op_4, 1),
+                           5: (self.op_5, 2),
+                           6: (self.op_6, 2),
+                           7: (self.op_7, 3),
+                           8: (self.op_8, 3),
+                           9: (self.op_9, 1)}
+        self.relative_base = 0
+
+        # parameter modes of the instruction that is currently being executed
+        self.current_modes = ()
+
+        self.halted = False
+        # the number of steps taken by run()
+        self.steps = 0
+        # records the program's inputs and outputs, if set (see Trace.record())
+        self.trace = None
+
+        # optionally, compile hot basic blocks into Python functions, which run
+        # much faster than interpreting one instruction at a time
+        self.block_compiler = BlockCompiler(self) if compile_blocks else None
+
+        # optionally, replace common pairs of instructions with superinstructions
+        # that execute both of them in a single dispatch, and count how often each
+        # kind of superinstruction is executed; on its own, this runs at about the
+        # same speed as the plain interpreter (the dispatch saved is paid back in a
+        # function call), so it's mostly useful for its counts, and for the hot
+        # pairs that compiled blocks leave to the interpreter
+        self.fusion_counts = Counter() if fuse_instructions else None
+        # superinstructions, keyed by the address of their first instruction
+        self.superinstructions = {}
+        # the addresses of the superinstructions that include each instruction
+        self.fused_sites = {}
+        if fuse_instructions:
+            self.fuse_instructions()
+
+        # optionally, record a profile of each run; profiling uses its own run
+        # loop, so that the normal run loops aren't slowed down by it
+        if profile and (compile_blocks or fuse_instructions):
+            raise ValueError('profiling measures the plain interpreter, so it can\'t be '
+                             'combined with compile_blocks or fuse_instructions')
+        self.profiler = Profiler() if profile else None
+
+        # optionally, translate the whole program into Python ahead of time (see
+        # ProgramCompiler), until the program runs code that it has written to
+        if compile_program and (compile_blocks or fuse_instructions or profile):
+            raise ValueError('compile_program can\'t be combined with compile_blocks, '
+                             'fuse_instructions or profile')
+        self.compiled_program = None
+        if compile_program:
+            self.compiled_program = load_compiled_program(list(self.program))
+
+    def run_program(self):
+        """Run intcode program and return its state after halting. Raises
+        EOFError if the program needs input once its input channel is empty.
+        """
+        if self.profiler is not None:
+            return self.run_profiled_program()
+
+        while True:
+            status = self.execute(None, self.read_input, self.write_output)
+            if status == HALTED:
+                return self.program
+            if status == NEEDS_INPUT:
+                raise EOFError('the program needs more input than its input '
+                               'channel has')
+
+    def run(self, max_steps=None):
+        """Run intcode program until it halts, needs input that its input channel
+        doesn't have yet, or produces an output, or until max_steps steps have
+        been taken. Returns HALTED, NEEDS_INPUT, OUTPUT_READY (once the output
+        has been sent to the output channel) or BUDGET_EXHAUSTED, respectively,
+        and can be called again to carry on from where the program stopped.
+
+        A step is a single dispatch: one instruction, or one superinstruction or
+        compiled block, if those are enabled. An input channel is considered to
+        be empty when reading from it raises IndexError or StopIteration, so a
+        deque that's appended to over time makes a good channel (whereas an
+        exhausted list iterator never sees values added later).
+        """
+        if self.profiler is not None:
+            raise ValueError('profiles are only recorded by run_program() and run_iter()')
+        if max_steps is not None and max_steps < 0:
+            raise ValueError('max_steps must not be negative: {}'.format(max_steps))
+        if self.halted:
+            return HALTED
+
+        return self.execute(max_steps, self.read_input, self.write_output)
+
+    def run_iter(self):
+        """Run intcode program as a generator, which is suspended whenever the
+        program produces output or needs input. This lets a driver interact with
+        the program from within the same process:
+
+            output = next(generator)     # run until the first output or input
+            output = generator.send(1)   # provide input after NEEDS_INPUT
+
+        Each output value is yielded as it is produced. When the program needs
+        input, NEEDS_INPUT is yielded and the program waits until a value is
+        passed in with send(). When the program halts, the generator stops
+        (returning the program's state) and self.halted is set.
+        """
+        if self.profiler is not None:
+            return (yield from self.run_profiled_iter())
+
+        inputs = deque()
+        outputs = deque()
+        while True:
+            status = self.execute(None, inputs.popleft, outputs.append)
+            if status == HALTED:
+                return self.program
+
+            if status == NEEDS_INPUT:
+                value = yield NEEDS_INPUT
+                while value is None:
+                    value = yield NEEDS_INPUT
+                inputs.append(value)
+            else:
+                yield outputs.popleft()
+
+    def execute(self, max_steps, read_input, write_output):
+        """The interpreter loop that run_program(), run() and run_iter() share.
+        It behaves like run(), but reads input from read_input and sends output
+        to write_output.
+
+        It's written to keep the work done per instruction to a minimum: the
+        program counter, relative base and step count are kept in locals, each
+        opcode is decoded with integer arithmetic rather than with decode(), and
+        parameters are read straight from memory, so that executing
+        an instruction doesn't create any tuples, lists or bound methods. Any
+        instruction that reaches past the end of memory is handed to its
+        operation method instead, which knows how to grow memory.
+
+        The optional tiers plug into the same loop: before an instruction is
+        interpreted, the address is looked up in the compiled blocks and the
+        superinstructions, and when either of them (or a compiled program) is
+        enabled, writes that land on the code that they depend on invalidate it.
+        """
+        if self.halted:
+            return HALTED
+
+        # compiled code only stops for inputs, outputs and halts, so it can't keep
+        # to a budget
+        if self.compiled_program is not None and max_steps is None:
+            status = self.run_compiled(read_input, write_output)
+            if status is not None:
+                return status
+
+        memory = self.program
+        trace = self.trace
+        pc = self.pc
+        relative_base = self.relative_base
+        # (compiled code leaves the program counter wherever it jumped to)
+        if pc < 0:
+            raise IndexError('negative address: {}'.format(pc))
+
+        block_compiler = self.block_compiler
+        superinstructions = self.superinstructions
+        tiered = block_compiler is not None or self.fusion_counts is not None
+        # the addresses that cached code depends on (including the compiled
+        # program, which is interpreted while running to a budget)
+        fused_sites = self.fused_sites
+        covered = block_compiler.covered if block_compiler is not None else {}
+        compiled_code = self.compiled_program.code if self.compiled_program is not None else {}
+        watching = tiered or self.compiled_program is not None
+        invalidate = self.invalidate
+
+        steps = 0
+        status = BUDGET_EXHAUSTED
+        try:
+            while steps != max_steps:
+                if tiered:
+                    if block_compiler is not None:
+                        block = block_compiler.lookup(pc)
+                        if block is not None:
+                            pc, relative_base = block(memory, relative_base)
+                            steps += 1
+                            if pc < 0:
+                                raise IndexError('negative address: {}'.format(pc))
+                            continue
+
+                    if pc in superinstructions:
+                        pc, relative_base = superinstructions[pc](memory, relative_base)
+                        steps += 1
+                        if pc < 0:
+                            raise IndexError('negative address: {}'.format(pc))
+                        continue
+
+                opcode = memory[pc]
+                operation = opcode % 100
+                try:
+                    # Addition/Multiplication/Less Than/Equals Operations
+                    if operation == 1 or operation == 2 or operation == 7 or operation == 8:
+                        mode = opcode // 100 % 10
+                        parameter1 = memory[pc + 1]
+                        if mode != 1:
+                            if mode == 2:
+                                parameter1 += relative_base
+                            parameter1 = memory[parameter1] if parameter1 >= 0 else memory.read(parameter1)
+
+                        mode = opcode // 1000 % 10
+                        parameter2 = memory[pc + 2]
+                        if mode != 1:
+                            if mode == 2:
+                                parameter2 += relative_base
+                            parameter2 = memory[parameter2] if parameter2 >= 0 else memory.read(parameter2)
+
+                        address = memory[pc + 3]
+                        if opcode // 10000 % 10 == 2:
+                            address += relative_base
+                        if address < 0:
+                            raise IndexError('negative address: {}'.format(address))
+
+                        if operation == 1:
+                            memory[address] = parameter1 + parameter2
+                        elif operation == 2:
+                            memory[address] = parameter1 * parameter2
+                        elif operation == 7:
+                            memory[address] = 1 if parameter1 < parameter2 else 0
+                        else:
+                            memory[address] = 1 if parameter1 == parameter2 else 0
+                        if watching and (address in fused_sites or address in covered or
+                                         address in compiled_code):
+                            invalidate(address)
+                        pc += 4
+
+                    # Jump-if-True/Jump-if-False Operations
+                    elif operation == 5 or operation == 6:
+                        mode = opcode // 100 % 10
+                        parameter1 = memory[pc + 1]
+                        if mode != 1:
+                            if mode == 2:
+                                parameter1 += relative_base
+                            parameter1 = memory[parameter1] if parameter1 >= 0 else memory.read(parameter1)
+
+                        if (parameter1 != 0) == (operation == 5):
+                            mode = opcode // 1000 % 10
+                            destination = memory[pc + 2]
+                            if mode != 1:
+                                if mode == 2:
+                                    destination += relative_base
+                                destination = memory[destination] if destination >= 0 else memory.read(destination)
+                            if destination < 0:
+                                raise IndexError('negative address: {}'.format(destination))
+                            pc = destination
+                        else:
+                            pc += 3
+
+                    # Adjust Relative Base Operation
+                    elif operation == 9:
+                        mode = opcode // 100 % 10
+                        parameter = memory[pc + 1]
+                        if mode != 1:
+                            if mode == 2:
+                                parameter += relative_base
+                            parameter = memory[parameter] if parameter >= 0 else memory.read(parameter)
+                        relative_base += parameter
+                        pc += 2
+
+                    # Input Operation
+                    elif operation == 3:
+                        try:
+                            value = read_input()
+                        except (IndexError, StopIteration):
+                            # leave the program counter on the input instruction, so
+                            # that it's retried when the program is resumed
+                            status = NEEDS_INPUT
+                            break
+                        if trace is not None:
+                            trace.record_input(value)
+
+                        address = memory[pc + 1]
+                        if opcode // 100 % 10 == 2:
+                            address += relative_base
+                        memory.write(address, value)
+                        if watching and (address in fused_sites or address in covered or
+                                         address in compiled_code):
+                            invalidate(address)
+                        pc += 2
+
+                    # Output Operation
+                    elif operation == 4:
+                        mode = opcode // 100 % 10
+                        parameter = memory[pc + 1]
+                        if mode == 0:
+                            value = memory.read(parameter)
+                        elif mode == 1:
+                            value = parameter
+                        else:
+                            value = memory.read(relative_base + parameter)
+                        if trace is not None:
+                            trace.record_output(value)
+
+                        pc += 2
+                        steps += 1
+                        write_output(value)
+                        status = OUTPUT_READY
+                        break
+
+                    # halt instruction
+                    elif opcode == 99:
+                        self.halted = True
+                        status = HALTED
+                        break
+
+                    else:
+                        raise ValueError('invalid opcode {} at address {}'.format(opcode, pc))
+
+                except IndexError:
+                    # input and output don't leave anything to retry
+                    if operation == 3 or operation == 4:
+                        raise
+
+                    # the instruction reached past the end of memory before it
+                    # changed anything, so run it again with its operation method
+                    self.pc = pc
+                    self.relative_base = relative_base
+                    operation, self.current_modes, _ = self.decode(pc)
+                    operation()
+                    pc = self.pc
+                    relative_base = self.relative_base
+
+                steps += 1
+        finally:
+            self.pc = pc
+            self.relative_base = relative_base
+            self.steps += steps
+
+        return status
+
+    def run_compiled(self, read_input, write_output):
+        """Runs the compiled program (see ProgramCompiler). Returns the same
+        statuses as execute(), or None if the program is about to run code that it
+        has written to, or jumped to code that couldn't be found statically, in
+        which case the compiled program is discarded and the rest of the program
+        is interpreted.
+        """
+        compiled_program = self.compiled_program
+        status, self.pc, self.relative_base, steps = compiled_program.function(
+            self.program, self.pc, self.relative_base, read_input, write_output,
+            self.trace, compiled_program.invalidated)
+        self.steps += steps
+
+        if status == CODE_WRITTEN or status == UNKNOWN_ADDRESS:
+            self.compiled_program = None
+            return None
+        if status == HALTED:
+            self.halted = True
+        return status
+
+    def run_profiled_program(self):
+        """Equivalent to run_program(), while recording a profile of the run."""
+        generator = self.run_profiled_iter()
+        try:
+            value = next(generator)
+            while True:
+                if value == NEEDS_INPUT:
+                    try:
+                        value = self.read_input()
+                    except (IndexError, StopIteration):
+                        raise EOFError('the program needs more input than its input '
+                                       'channel has') from None
+                    value = generator.send(value)
+                else:
+                    self.write_output(value)
+                    value = next(generator)
+        except StopIteration:
+            pass
+
+        return self.program
+
+    def run_profiled_iter(self):
+        """Equivalent to run_iter(), while recording a profile of the run in
+        self.profiler (see Profiler for what is recorded).
+        """
+        profiler = self.profiler
+        input_operation = self.jump_table[3][0]
+        output_operation = self.jump_table[4][0]
+
+        # the inferred subroutine frames that are currently active
+        frames = ['main']
+        stack = 'main'
+        new_block = True
+        start_time = last_io_time = time.perf_counter()
+
+        try:
+            while True:
+                pc = self.pc
+                operation, self.current_modes, _ = self.decode(pc)
+
+                opcode = self.program.read(pc)
+                profiler.instructions += 1
+                profiler.operation_counts[opcode % 100] += 1
+                profiler.address_counts[pc] += 1
+                profiler.stack_counts[stack] += 1
+                if new_block:
+                    profiler.block_counts[pc] += 1
+                new_block = opcode % 100 in (5, 6)
+
+                # halt instruction
+                if operation is None:
+                    self.halted = True
+                    return self.program
+
+                # count the memory accessed by position and relative mode parameters
+                n = len(self.current_modes)
+                for i, mode in enumerate(self.current_modes, 1):
+                    if mode == '1':
+                        continue
+                    address = self.program.read(pc + i)
+                    if mode == '2':
+                        address += self.relative_base
+
+                    if i == n and opcode % 100 in WRITING_OPERATIONS:
+                        profiler.write_counts[address] += 1
+                    else:
+                        profiler.read_counts[address] += 1
+
+                if operation is input_operation:
+                    now = time.perf_counter()
+                    profiler.io_events.append(('in', now - last_io_time))
+                    last_io_time = now
+
+                    value = yield NEEDS_INPUT
+                    while value is None:
+                        value = yield NEEDS_INPUT
+
+                    if self.trace is not None:
+                        self.trace.record_input(value)
+                    self.write(self.set_parameter(1), value)
+                    self.pc += 2
+                    self.steps += 1
+
+                elif operation is output_operation:
+                    now = time.perf_counter()
+                    profiler.io_events.append(('out', now - last_io_time))
+                    last_io_time = now
+
+                    output = self.get_parameters(1)[0]
+                    if self.trace is not None:
+                        self.trace.record_output(output)
+                    self.pc += 2
+                    self.steps += 1
+                    yield output
+
+                else:
+                    relative_base = self.relative_base
+                    operation()
+                    self.steps += 1
+
+                    # infer subroutine frames from changes to the relative base
+                    if self.relative_base > relative_base:
+                        frames.append('f{}'.format(pc))
+                        stack = ';'.join(frames)
+                    elif self.relative_base < relative_base and len(frames) > 1:
+                        frames.pop()
+                        stack = ';'.join(frames)
+        finally:
+            profiler.wall_time += time.perf_counter() - start_time
+
+    def decode(self, address):
+        """Decodes the instruction at the given address into its operation,
+        parameter modes and length. Only the slow paths (profiling, and
+        instructions that reach past the end of memory) use it; the run loop
+        decodes opcodes with integer arithmetic instead.
+        """
+        opcode = self.program.read(address)
+
+        # halt instruction
+        if opcode == 99:
+            return None, (), 1
+
+        # only look at the 2 rightmost digits of the opcode to determine
+        # the proper operation to perform
+        operation, n = self.jump_table[opcode % 100]
+        return operation, parameter_modes(opcode, n), n + 1
+
+    def write(self, address, value):
+        """Writes a value to memory, discarding any cached code that depends on
+        it (see invalidate()).
+        """
+        if 0 <= address < len(self.program):
+            self.program[address] = value
+        else:
+            # address is negative or past the end of the list
+            self.program.write(address, value)
+        self.invalidate(address)
+
+    def invalidate(self, address):
+        """Discards all cached code that depends on the value at the given
+        address (the superinstructions and compiled blocks that include it, and
+        the compiled program's entries that cover it), so that self-modifying
+        programs still behave correctly. Compiled blocks call this for their own
+        writes to code.
+        """
+        # superinstructions that include this instruction are no longer valid
+        for fused_address in self.fused_sites.pop(address, ()):
+            self.superinstructions.pop(fused_address, None)
+        if self.block_compiler is not None and address in self.block_compiler.covered:
+            self.block_compiler.invalidate(address)
+        if self.compiled_program is not None:
+            self.compiled_program.invalidate(address)
+
+    def snapshot(self):
+        """Returns a copy of the computer's state (its memory, program counter
+        and relative base), which can later be passed to restore().
+        """
+        return (self.program.copy(), self.pc, self.relative_base, self.halted)
+
+    def restore(self, snapshot):
+        """Returns the computer to a state previously returned by snapshot()."""
+        program, self.pc, self.relative_base, self.halted = snapshot
+        # copy the snapshot's memory so that the same snapshot can be restored again
+        self.program = program.copy()
+        if self.block_compiler is not None:
+            self.block_compiler.clear()
+        if self.fusion_counts is not None:
+            self.fuse_instructions()
+
+    def fork(self, input_channel=None, output_channel=None):
+        """Returns a new IntcodeComputer in the same state as this one, which
+        can be run independently of it (e.g. to explore a different branch of a
+        search without having to backtrack).
+
+        The clone has the same options as this computer. If this computer is
+        profiled, the clone records its own profile, from the fork onwards; if
+        this computer is being traced, the clone carries on from a copy of the
+        trace, so that its trace can still be replayed from the start.
+        """
+        computer = IntcodeComputer([], input_channel, output_channel,
+                                   compile_blocks=self.block_compiler is not None,
+                                   profile=self.profiler is not None)
+        computer.program = self.program.copy()
+        computer.pc = self.pc
+        computer.relative_base = self.relative_base
+        computer.halted = self.halted
+        if self.trace is not None:
+            computer.trace = self.trace.copy()
+        if self.compiled_program is not None:
+            computer.compiled_program = self.compiled_program.copy()
+        if self.fusion_counts is not None:
+            computer.fusion_counts = Counter()
+            computer.fuse_instructions()
+        return computer
+
+    def fuse_instructions(self):
+        """Finds common pairs of instructions in the program, and adds a
+        superinstruction for each pair to self.superinstructions (see
+        InstructionFuser for the pairs that are fused).
+        """
+        # (cleared in place, since the run loop and compiled blocks hold on to them)
+        self.superinstructions.clear()
+        self.fused_sites.clear()
+        InstructionFuser(self).fuse()
+
+    def get_parameters(self, n):
+        """Returns the next n parameters following the current opcode.
+        Used to obtain "get" parameters (i.e. parameters that an instruction reads from)
+        """
+        return [self.get_parameter(i) for i in range(1, n + 1)]
+
+    def get_parameter(self, n):
+        """Returns the value of the nth "get" parameter (from 1) of the current
+        instruction.
+        """
+        memory = self.program
+        mode = self.current_modes[n - 1]
+
+        parameter_register_value = memory[self.pc + n]
+
+        # immediate mode
+        if mode == '1':
+            return parameter_register_value
+
+        # position mode
+        if mode == '0':
+            address = parameter_register_value
+
+        # relative mode
+        elif mode == '2':
+            address = self.relative_base + parameter_register_value
+
+        if 0 <= address < len(memory):
+            return memory[address]
+        # address is negative or past the end of the list
+        return memory.read(address)
+
+    def set_parameter(self, n):
+        """Returns the nth parameter for the current opcode. n = 1 or n = 3
+        Used to obtain "set" parameters (i.e. parameters that an instruction writes to)
+
+        The following post was very helpful in implementing this method:
+        https://old.reddit.com/r/adventofcode/comments/e8aw9j/2019_day_9_part_1_how_to_fix_203_error/faajho3/
+        """
+        # determine parameter mode
+        mode = self.current_modes[n - 1]
+
+        parameter_register_value = self.program[self.pc + n]
+
+        # position mode
+        if mode == '0':
+            return parameter_register_value
+        # relative mode
+        elif mode == '2':
+            return self.relative_base + parameter_register_value
+
+
+    #############################
+    ########## Opcodes ##########
+    #############################
+
+    def op_1(self):
+        """Addition Operation"""
+        addend1, addend2 = self.get_parameters(2)
+        output_register = self.set_parameter(3)
+        self.write(output_register, addend1 + addend2)
+        self.pc += 4
+
+    def op_2(self):
+        """Multiplication Operation"""
+        multiplicand1, multiplicand2  = self.get_parameters(2)
+        output_register = self.set_parameter(3)
+        self.write(output_register, multiplicand1 * multiplicand2)
+        self.pc += 4
+
+    def op_3(self):
+        """Input Operation"""
+        save_to_register = self.set_parameter(1)
+        value = self.read_input()
+        if self.trace is not None:
+            self.trace.record_input(value)
+        self.write(save_to_register, value)
+        self.pc += 2
+
+    def op_4(self):
+        """Output Operation"""
+        output = self.get_parameters(1)[0]
+        if self.trace is not None:
+            self.trace.record_output(output)
+        self.write_output(output)
+        self.pc += 2
+
+    def op_5(self):
+        """Jump-if-True Operation"""
+        # the destination is only read if the jump is taken
+        if self.get_parameter(1) != 0:
+            self.jump(self.get_parameter(2))
+        else:
+            self.pc += 3
+
+    def op_6(self):
+        """Jump-if-False Operation"""
+        # the destination is only read if the jump is taken
+        if self.get_parameter(1) == 0:
+            self.jump(self.get_parameter(2))
+        else:
+            self.pc += 3
+
+    def op_7(self):
+        """Less Than Operation"""
+        parameter1, parameter2 = self.get_parameters(2)
+        output_register = self.set_parameter(3)
+
+        if parameter1 < parameter2:
+            self.write(output_register, 1)
+        else:
+            self.write(output_register, 0)
+
+        self.pc += 4
+
+    def op_8(self):
+        """Equals Operation"""
+        parameter1, parameter2 = self.get_parameters(2)
+        output_register = self.set_parameter(3)
+
+        if parameter1 == parameter2:
+            self.write(output_register, 1)
+        else:
+            self.write(output_register, 0)
+
+        self.pc += 4
+
+    def jump(self, destination):
+        """Moves the program counter to the destination of a jump."""
+        if destination < 0:
+            raise IndexError('negative address: {}'.format(destination))
+        self.pc = destination
+
+    def op_9(self):
+        """Adjust Relative Base Operation"""
+        new_relative_base = self.get_parameters(1)[0]
+        self.relative_base += new_relative_base
+
+        self.pc += 2
+
+def load(filename):
+    """Returns the intcode program stored in the given file (see
+    ProgramImage.load_program for how parsed programs are cached).
+    """
+    return load_program(filename)
+
+def run(program, input_channel=None, output_channel=None, **options):
+    """Runs an intcode program until it halts, and returns its final memory.
+    Any keyword arguments are passed to the IntcodeComputer (e.g.
+    compile_blocks=True).
+    """
+    computer = IntcodeComputer(program, input_channel, output_channel, **options)
+    return computer.run_program()
+
+def test():
+    """Checks that the plain interpreter doesn't allocate memory per instruction:
+    the most memory that it has allocated at once while running a loop shouldn't
+    depend on how many times the loop goes round. (Integers that CPython doesn't
+    cache are still created and freed along the way, which is why this compares
+    peaks rather than counting allocations.)
+
+    Then checks that programs behave the same way with each kind of memory and
+    each execution tier, including programs that go wrong.
+    """
+    import tracemalloc
+
+    def peak_allocated(count):
+        # count down from count to 0, one add and one jump per iteration
+        program = [1001, 20, -1, 20, 1005, 20, 0, 99] + [0] * 13
+        program[20] = count
+        computer = IntcodeComputer(program, [], [])
+
+        tracemalloc.start()
+        try:
+            assert computer.run() == HALTED
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    # warm up, so that nothing that's allocated once is counted
+    peak_allocated(100)
+    assert peak_allocated(100000) <= peak_allocated(100) + 1024
+
+    tiers = [{},
+             {'paged_memory': True},
+             {'compile_blocks': True},
+             {'fuse_instructions': True},
+             {'compile_blocks': True, 'fuse_instructions': True},
+             {'compile_program': True},
+             {'profile': True}]
+
+    def fails(program, **options):
+        try:
+            IntcodeComputer(program, [], [], **options).run_program()
+        except IndexError:
+            return True
+        return False
+
+    # negative addresses are errors, rather than wrapping around to the end of
+    # memory: reading, writing, relative reads in a hot loop, and jumping
+    for program in ([1, -1, -1, 9, 4, 9, 99, 0, 0, 42],
+                    [1101, 5, 0, -1, 4, 0, 99],
+                    [1001, 50, 1, 50, 1008, 50, 15, 51, 1002, 51, -500, 52, 9, 52,
+                     22201, 40, 40, 40, 1007, 50, 30, 54, 1005, 54, 0, 99] + [0] * 30,
+                    [1105, 1, -2, 99]):
+        for options in tiers:
+            assert fails(program, **options), (program, options)
+
+    def outputs(program, **options):
+        outputs = []
+        IntcodeComputer(program, [], outputs, **options).run_program()
+        return outputs
+
+    # a comparison and the jump that tests its result are fused, but the program
+    # patches the jump to test a different address before they run
+    program = [1101, 21, 0, 9, 1107, 1, 2, 20, 1005, 20, 15, 104, 0, 99, 0,
+               104, 1, 99, 0, 0, 0, 0]
+    for options in tiers:
+        assert outputs(program, **options) == [0], options
+
+    # a hot loop that, on its 20th time round, patches the jump at the end of the
+    # loop (fused with the comparison before it) from jump-if-true to
+    # jump-if-false, through a write in a compiled block
+    program = [1001, 60, 1, 60, 1008, 60, 20, 63, 1002, 63, -16, 64,
+               1001, 64, 40, 19, 1101, 0, 1006, 40, 1007, 60, 30, 62,
+               1005, 62, 0, 4, 60, 99] + [0] * 40
+    for options in tiers:
+        assert outputs(program, **options) == [20], options
+
+    # an untaken jump whose destination would be a negative address, in a hot
+    # loop (so that it's compiled)
+    program = [1001, 50, 1, 50, 2106, 1, -5, 1007, 50, 20, 51, 1005, 51, 0,
+               4, 50, 99] + [0] * 40
+    for options in tiers:
+        assert outputs(program, **options) == [20], options
+
+    # a program that runs out of input fails the same way in every tier, and
+    # profiling counts the same steps as the plain interpreter
+    for options in tiers:
+        computer = IntcodeComputer([3, 9, 4, 9, 3, 9, 99], [5], [], **options)
+        try:
+            computer.run_program()
+            assert False, options
+        except EOFError:
+            pass
+    steps = []
+    for options in ({}, {'profile': True}):
+        computer = IntcodeComputer([1001, 20, -1, 20, 1005, 20, 0, 99] + [0] * 12 + [10],
+                                   [], [], **options)
+        computer.run_program()
+        steps.append(computer.steps)
+    assert steps == [20, 20]
+
+    # a write past the end of the program grows both kinds of memory alike
+    program = [1101, 5, 6, 100, 4, 100, 99]
+    memory = IntcodeComputer(program, [], []).run_program()
+    paged_memory = IntcodeComputer(program, [], [], paged_memory=True).run_program()
+    assert len(memory) == len(paged_memory) == 101
+    assert paged_memory == memory and paged_memory.tolist() == list(memory)
+
+    # data after the halt that decodes as an instruction running past the end
+    # of the program
+    program = [1005, 6, 5, 99, 0, 1, 0]
+    for options in tiers:
+        assert IntcodeComputer(program, [], [], **options).run_program() == program, options
+
+    # a program that patches one of its own instructions while it's interpreted
+    # to a budget, and then runs the patched instruction when it's resumed
+    # without one
+    program = [1101, 1102, 0, 10, 104, 0, 1105, 1, 10, 0, 1101, 3, 4, 30,
+               4, 30, 99] + [0] * 16
+    # (profiles aren't recorded by run())
+    for options in tiers[:-1]:
+        values = []
+        computer = IntcodeComputer(program, [], values, **options)
+        computer.run(max_steps=5)
+        computer.run()
+        assert values == [0, 12], options
+
+    # a fork keeps its parent's options, and carries on from a copy of its trace
+    from .Trace import Trace
+    program = [3, 20, 4, 20, 3, 20, 1002, 20, 2, 20, 4, 20, 99] + [0] * 8
+    for options in tiers:
+        outputs = []
+        computer = IntcodeComputer(program, [], outputs, **options)
+        trace = Trace.record(computer)
+        generator = computer.run_iter()
+        assert next(generator) == NEEDS_INPUT
+        assert generator.send(3) == 3
+        assert next(generator) == NEEDS_INPUT
+        fork = computer.fork(deque([7]), outputs)
+        assert (fork.profiler is None) == (computer.profiler is None), options
+        assert (fork.block_compiler is None) == (computer.block_compiler is None), options
+        assert type(fork.program) is type(computer.program), options
+        fork.run_program()
+        assert outputs == [14] and trace.outputs == [3], options
+        assert fork.trace.inputs == [3, 7] and fork.trace.outputs == [3, 14], options
+        assert fork.trace.replay(program).halted, options
+
+    # a negative budget is an error, rather than no budget at all
+    computer = IntcodeComputer([1105, 1, 0], [], [])
+    try:
+        computer.run(max_steps=-1)
+        assert False
+    except ValueError:
+        pass
+    assert computer.run(max_steps=0) == BUDGET_EXHAUSTED and computer.steps == 0
+
+def main():
+    """When called from the command line and provided with an intcode program,
+    create an IntcodeComputer object and run the given program. With --profile,
+    the profile of the run is written next to the program, as JSON (.profile.json)
+    and as collapsed stacks for flame graph tools (.folded).
+    """
+    program_filename = sys.argv[1] # path to the intcode program
+    profile = '--profile' in sys.argv[2:]
+
+    # create IntcodeComputer object and run the provided program
+    computer = IntcodeComputer(load(program_filename), profile=profile)
+    computer.run_program()
+
+    if profile:
+        computer.profiler.write_json(program_filename + '.profile.json')
+        computer.profiler.write_collapsed_stacks(program_filename + '.folded')
+
+if __name__ == '__main__':
+    main()
+    # test()
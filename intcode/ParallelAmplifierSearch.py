@@ -0,0 +1,173 @@
+from concurrent.futures import as_completed
+from itertools import permutations
+from math import perm
+import os
+import sys
+import time
+
+from .AmplifierChain import AmplifierChain, AmplifierSearch, amplifier_count_for
+from .Arguments import Arguments
+from .IntcodeComputer import load
+from .ParameterSweep import call_in_worker, worker_pool
+
+class ParallelAmplifierSearch():
+    """Finds the phase sequence that gives the highest thruster signal for an
+    amplifier chain (see AmplifierChain), spreading the phase sequences across
+    a pool of worker processes.
+
+    The sequences are sharded by their first few phase settings, so that
+    there are a few shards for each worker, and each worker searches whole
+    shards: without a feedback loop, with an AmplifierSearch (which shares the
+    amplifier runs of common prefixes within the shard); with one, by running
+    an AmplifierChain for each sequence. The results of the shards are then
+    reduced to the highest signal, taking the first sequence in permutation
+    order if there's a tie. There are never more workers than shards, and with
+    a single one (e.g. for a search too small to shard), the shards are searched
+    in this process. Any keyword arguments are passed to the IntcodeComputers.
+    """
+
+    # shards per worker, so that the work stays balanced as shards finish
+    SHARDS_PER_WORKER = 4
+    # the fewest sequences in a shard, so that each shard has common prefixes to
+    # share, and a search the size of day 7's (120 sequences) isn't worth
+    # starting worker processes for
+    MIN_SHARD_SIZE = 120
+
+    def __init__(self, program, phase_settings=range(5), amplifier_count=None,
+                 feedback_loop=False, max_workers=None, **options):
+        self.program = list(program)
+        self.phase_settings = list(phase_settings)
+        self.amplifier_count = amplifier_count_for(self.phase_settings, amplifier_count)
+        self.feedback_loop = feedback_loop
+        self.max_workers = max_workers or os.cpu_count()
+        self.options = options
+
+        # statistics of the last run
+        self.workers = 0
+        self.sequences = 0
+        self.amplifier_runs = 0
+        self.wall_time = 0
+
+    @property
+    def total_sequences(self):
+        return perm(len(self.phase_settings), self.amplifier_count)
+
+    def shards(self):
+        """Returns the prefixes that the phase sequences are sharded by, in
+        permutation order.
+        """
+        wanted = self.SHARDS_PER_WORKER * self.max_workers
+        most = self.total_sequences // self.MIN_SHARD_SIZE
+        length = 0
+        while length < self.amplifier_count and \
+              perm(len(self.phase_settings), length) < wanted and \
+              perm(len(self.phase_settings), length + 1) <= most:
+            length += 1
+        return list(permutations(self.phase_settings, length))
+
+    def search_shard(self, prefix):
+        """Searches the phase sequences that start with the given prefix."""
+        if not self.feedback_loop:
+            search = AmplifierSearch(self.program, self.phase_settings,
+                                     self.amplifier_count, **self.options)
+            signal, sequence = search.run(prefix=prefix)
+            return signal, sequence, search.sequences, search.amplifier_runs
+
+        best_signal = best_sequence = None
+        sequences = 0
+        remaining = [phase for phase in self.phase_settings if phase not in prefix]
+        for suffix in permutations(remaining, self.amplifier_count - len(prefix)):
+            sequence = prefix + suffix
+            signal = AmplifierChain(self.program, sequence, True, **self.options).run()
+            sequences += 1
+            if best_signal is None or signal > best_signal:
+                best_signal, best_sequence = signal, sequence
+        return best_signal, best_sequence, sequences, sequences * self.amplifier_count
+
+    def run(self, progress=None):
+        """Returns the highest thruster signal, along with the phase sequence
+        that produced it. If given, progress(sequences, total) is called as each
+        shard is finished, with the number of sequences searched so far.
+        """
+        shards = self.shards()
+        self.workers = min(self.max_workers, len(shards))
+        results = [None] * len(shards)
+        self.sequences = self.amplifier_runs = 0
+        start = time.perf_counter()
+
+        def finished(index, result):
+            results[index] = result
+            self.sequences += result[2]
+            self.amplifier_runs += result[3]
+            if progress is not None:
+                progress(self.sequences, self.total_sequences)
+
+        if self.workers == 1:
+            for index, prefix in enumerate(shards):
+                finished(index, self.search_shard(prefix))
+        else:
+            # each worker is sent the search once, rather than with every shard
+            with worker_pool(self.workers, self) as executor:
+                futures = {executor.submit(call_in_worker, ParallelAmplifierSearch.search_shard,
+                                           prefix): index
+                           for index, prefix in enumerate(shards)}
+                for future in as_completed(futures):
+                    finished(futures[future], future.result())
+
+        self.wall_time = time.perf_counter() - start
+
+        # reduce in permutation order, so that ties go to the earliest sequence
+        best_signal = best_sequence = None
+        for signal, sequence, _, _ in results:
+            if best_signal is None or signal > best_signal:
+                best_signal, best_sequence = signal, sequence
+        return best_signal, best_sequence
+
+def parse_phase_settings(text):
+    """Parses phase settings given as a range (e.g. "0-7") or as a list (e.g.
+    "5,6,7,8,9").
+    """
+    if '-' in text:
+        first, last = text.split('-')
+        return list(range(int(first), int(last) + 1))
+    return [int(phase) for phase in text.split(',')]
+
+def main():
+    """When called from the command line with an amplifier program, search for
+    the phase sequence with the highest thruster signal, reporting progress and
+    throughput as it goes.
+
+    Usage: python3 -m intcode amplifiers PROGRAM [--phases 0-4] [--amplifiers N]
+                                                 [--feedback-loop] [--workers N]
+                                                 [--compile-program]
+    """
+    arguments = Arguments()
+    phase_settings = parse_phase_settings(arguments.option('--phases', '0-4'))
+    amplifier_count = arguments.option('--amplifiers')
+    max_workers = arguments.option('--workers')
+    feedback_loop = arguments.switch('--feedback-loop')
+    compile_program = arguments.switch('--compile-program')
+    program = load(arguments.args[0])
+
+    search = ParallelAmplifierSearch(
+        program, phase_settings, None if amplifier_count is None else int(amplifier_count),
+        feedback_loop, None if max_workers is None else int(max_workers),
+        compile_program=compile_program)
+
+    start = time.perf_counter()
+    def progress(sequences, total):
+        elapsed = time.perf_counter() - start
+        print('\r{:,}/{:,} sequences ({:,.0f} sequences/s)'.format(
+            sequences, total, sequences / elapsed), end='', file=sys.stderr)
+
+    signal, sequence = search.run(progress)
+    print(file=sys.stderr)
+
+    print('{} from phase sequence {}'.format(signal, ','.join(map(str, sequence))))
+    print('{:,} sequences, {:,} amplifier runs in {:.3f}s with {} workers '
+          '({:,.0f} sequences/s, {:,.0f} amplifier runs/s)'.format(
+              search.sequences, search.amplifier_runs, search.wall_time, search.workers,
+              search.sequences / search.wall_time, search.amplifier_runs / search.wall_time))
+
+if __name__ == '__main__':
+    main()
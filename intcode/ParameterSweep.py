@@ -0,0 +1,137 @@
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import count, islice
+import os
+
+from .IntcodeComputer import IntcodeComputer
+
+# state of each worker process, set once by initialize_worker() so that it (e.g.
+# the program) doesn't have to be sent (or re-read from disk) with every task
+worker_state = None
+
+def initialize_worker(state):
+    global worker_state
+    worker_state = state
+
+def worker_pool(max_workers, state):
+    """Returns a pool of worker processes, which are each given the state once,
+    when they start. Tasks are submitted with call_in_worker().
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=initialize_worker,
+                               initargs=(state,))
+
+def call_in_worker(function, *args):
+    """Returns function(state, *args) in a worker process started by
+    worker_pool(), where state is the worker's state. The function must be
+    picklable (e.g. a module-level function, or a method of a module-level
+    class).
+    """
+    return function(worker_state, *args)
+
+def evaluate_chunk(state, cases):
+    """Runs the program once for each case in a chunk, and returns the cases
+    (along with their outputs) that satisfy the predicate, given the
+    (program, predicate, options) state of a worker.
+    """
+    program, predicate, options = state
+    matches = []
+    for case in cases:
+        patches, inputs = case
+        patched_program = program.copy()
+        for address, value in patches.items():
+            patched_program[address] = value
+
+        outputs = []
+        computer = IntcodeComputer(patched_program, list(inputs), outputs, **options)
+        memory = computer.run_program()
+
+        if predicate(memory, outputs):
+            matches.append((case, outputs))
+
+    return matches
+
+class ParameterSweep():
+    """Runs an Intcode program over a search space of cases, spread across a pool
+    of worker processes.
+
+    Each case is a (patches, inputs) pair: patches is a dict of {address: value}
+    that is applied to a fresh copy of the program, and inputs is the sequence of
+    values that the program reads. After each run, predicate(memory, outputs) is
+    called with the program's final memory and its outputs, to decide whether the
+    case is a match.
+
+    The program and predicate are sent to each worker once, when the worker
+    starts, and cases are sent in chunks. The predicate must be picklable (e.g. a
+    module-level function) if the platform starts worker processes by spawning
+    rather than forking them. Any other keyword arguments are passed to each
+    IntcodeComputer (e.g. compile_blocks=True).
+    """
+
+    def __init__(self, program, predicate, max_workers=None, chunk_size=256,
+                 **computer_options):
+        self.program = list(program)
+        self.predicate = predicate
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.computer_options = computer_options
+
+    def matches(self, cases):
+        """Yields a (case, outputs) pair for each case that satisfies the
+        predicate, in the order that they're found (which isn't necessarily the
+        order of the cases). Cases are read lazily, so the search space may be
+        very large, and closing the generator early cancels the remaining work.
+        """
+        cases = iter(cases)
+        max_workers = self.max_workers or os.cpu_count()
+        executor = worker_pool(max_workers, (self.program, self.predicate,
+                                             self.computer_options))
+        # keep a couple of chunks queued up for each worker
+        max_pending = 2 * max_workers
+        pending = set()
+
+        try:
+            while True:
+                while len(pending) < max_pending:
+                    chunk = list(islice(cases, self.chunk_size))
+                    if not chunk:
+                        break
+                    pending.add(executor.submit(call_in_worker, evaluate_chunk, chunk))
+
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def find(self, cases):
+        """Returns the (case, outputs) pair for the first case that's found to
+        satisfy the predicate, or None if there isn't one. Stops as soon as a
+        match has been found.
+        """
+        matches = self.matches(cases)
+        try:
+            return next(matches, None)
+        finally:
+            matches.close()
+
+def outputs_1234(memory, outputs):
+    """The predicate for test() (module-level, so that it can be pickled)."""
+    return outputs == [1234]
+
+def test():
+    # reads a value into address 9, adds it to the value at address 10, and
+    # outputs the sum
+    program = [3, 9, 1, 9, 10, 10, 4, 10, 99, 0, 0]
+    cases = (({10: patch}, (value,)) for patch in range(100) for value in range(1200, 1300))
+    sweep = ParameterSweep(program, outputs_1234, max_workers=2, chunk_size=500)
+
+    # (matches are found in any order)
+    matches = sorted(sweep.matches(cases), key=lambda match: match[0][0][10])
+    assert matches == [(({10: patch}, (1234 - patch,)), [1234]) for patch in range(35)]
+
+    # finding a match stops the search, even though the cases never run out
+    case, outputs = sweep.find(({10: 0}, (value,)) for value in count())
+    assert case == ({10: 0}, (1234,)) and outputs == [1234]
+    assert sweep.find([({10: 0}, (1,))]) is None
@@ -0,0 +1,63 @@
+from collections import Counter
+import json
+
+class Profiler():
+    """Records where an Intcode program spends its time, for an IntcodeComputer
+    created with profile=True.
+
+    Executed instructions are counted per operation, per address and per basic
+    block (a block starting after each jump). Reads and writes of memory through
+    position and relative mode parameters are counted per address, and the wall
+    time between consecutive input/output events is recorded.
+
+    Intcode has no call instruction, so subroutine frames are inferred from the
+    relative base: an Adjust Relative Base Operation that increases it is treated
+    as the prologue of a subroutine (named after the address of that operation),
+    and one that decreases it as the epilogue. Instruction counts are kept per
+    stack of frames, and can be exported in the collapsed-stack format used by
+    flame graph tools.
+    """
+
+    def __init__(self):
+        self.operation_counts = Counter()
+        self.address_counts = Counter()
+        self.block_counts = Counter()
+        self.read_counts = Counter()
+        self.write_counts = Counter()
+        # instruction counts, keyed by the collapsed stack of inferred frames
+        self.stack_counts = Counter()
+        # ('in' or 'out', seconds since the previous input/output event)
+        self.io_events = []
+
+        self.instructions = 0
+        self.wall_time = 0
+
+    def to_dict(self):
+        """Returns the profile as JSON-serializable data."""
+        def by_key(counter):
+            return {str(key): count for key, count in sorted(counter.items())}
+
+        return {'instructions': self.instructions,
+                'wall_time': self.wall_time,
+                'operations': by_key(self.operation_counts),
+                'addresses': by_key(self.address_counts),
+                'blocks': by_key(self.block_counts),
+                'reads': by_key(self.read_counts),
+                'writes': by_key(self.write_counts),
+                'io_events': [{'event': event, 'seconds': seconds}
+                              for event, seconds in self.io_events]}
+
+    def write_json(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def collapsed_stacks(self):
+        """Returns the instruction counts per stack, one "frame;frame;... count"
+        line per stack.
+        """
+        return '\n'.join('{} {}'.format(stack, count)
+                         for stack, count in sorted(self.stack_counts.items()))
+
+    def write_collapsed_stacks(self, filename):
+        with open(filename, 'w') as f:
+            f.write(self.collapsed_stacks() + '\n')
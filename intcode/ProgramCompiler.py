@@ -0,0 +1,414 @@
+from collections import OrderedDict
+import importlib.util
+import marshal
+import os
+import sys
+
+from .BlockCompiler import generate_address_check, generate_read
+from .Disassembler import Disassembler
+from .ProgramImage import digest, write_atomically
+
+# bumped whenever the generated code changes, so that stale caches are ignored
+COMPILER_VERSION = 3
+
+# compiled programs are cached in the user's cache directory (rather than in the
+# installed package), which can be moved with INTCODE_CACHE_DIR
+CACHE_DIRECTORY = os.environ.get('INTCODE_CACHE_DIR') or os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'intcode')
+# the most compiled programs that are kept in the cache directory; the least
+# recently written ones are deleted beyond that
+MAX_CACHED_PROGRAMS = 256
+
+# reasons (besides the computer's statuses) for a compiled program to hand
+# control back to the interpreter
+UNKNOWN_ADDRESS = 'UNKNOWN_ADDRESS'
+CODE_WRITTEN = 'CODE_WRITTEN'
+
+# entries with at most this many addresses are dispatched by testing each of them
+# in turn, rather than by splitting them in half
+LINEAR_DISPATCH = 4
+
+# the functions and code maps of the programs that have been loaded in this
+# process most recently, keyed by their programs (as tuples)
+loaded = OrderedDict()
+# the most programs that are kept in loaded
+MAX_LOADED_PROGRAMS = 32
+
+class CompiledProgram():
+    """An Intcode program translated ahead of time into a single Python function,
+    along with the state that one computer needs to run it.
+
+    The function is called as run(m, pc, rb, read_input, write_output, trace,
+    invalidated), where m is the computer's memory, and returns (status, pc, rb,
+    steps). It runs the program from pc until it halts, needs input that
+    read_input doesn't have, or produces an output (returning HALTED,
+    NEEDS_INPUT or OUTPUT_READY, the same as IntcodeComputer.run()), until it
+    jumps to an address that wasn't compiled (UNKNOWN_ADDRESS), or until it's
+    about to run code that has been written to (CODE_WRITTEN). In each case, pc
+    and rb are the state to carry on from.
+
+    code maps each address that the compiled code depends on to the entries
+    whose code depends on it, and invalidated holds the entries that mustn't be
+    run any more, since their code has been written to.
+    """
+
+    def __init__(self, function, code):
+        self.function = function
+        self.code = code
+        self.invalidated = set()
+
+    def invalidate(self, address):
+        """Marks the code that depends on the given address as invalid."""
+        self.invalidated.update(self.code.get(address, ()))
+
+    def copy(self):
+        compiled_program = CompiledProgram(self.function, self.code)
+        compiled_program.invalidated = set(self.invalidated)
+        return compiled_program
+
+class ProgramCompiler():
+    """Translates a whole Intcode program into the source code of a Python module.
+
+    The instructions are found statically (see Disassembler), and are compiled
+    into one function: a while loop that dispatches on pc, through a tree of if
+    statements over the entries (the addresses that control can enter at: the
+    starts of basic blocks, and the instructions after inputs and outputs). Each
+    entry runs straight-line code, with its parameters inlined, up to the next
+    jump, output or halt.
+
+    Programs compiled by the Intcode compiler patch the parameters of their own
+    instructions (e.g. to index into an array), so parameters that are written
+    to by constant-address writes are read from memory at runtime. Any other
+    write into the compiled code invalidates the entries whose code covers it,
+    and the function returns CODE_WRITTEN instead of running them (or straight
+    away, if the write lands further on in the code that's running). Static
+    analysis can mistake data for code, so nothing is given up until then.
+    """
+
+    def __init__(self, program):
+        self.program = program
+        self.disassembler = Disassembler(program)
+        instructions = self.disassembler.instructions
+
+        # parameters that the program overwrites, which are read at runtime
+        self.volatile = set()
+        for _, address in self.disassembler.self_modifying_writes:
+            if address not in instructions:
+                self.volatile.add(address)
+
+        entries = set(self.disassembler.blocks)
+        for instruction in instructions.values():
+            if instruction.operation == 3:
+                entries.add(instruction.address)
+            if instruction.operation in (3, 4):
+                entries.add(instruction.address + instruction.length)
+
+        # the instructions that each entry runs, and the entries that depend on
+        # each address
+        self.chunks = {}
+        self.code = {}
+        for entry in sorted(entries & set(instructions)):
+            chunk = self.chunk(entry)
+            if not chunk:
+                continue
+            self.chunks[entry] = chunk
+            for instruction in chunk:
+                for address in range(instruction.address, instruction.address + instruction.length):
+                    if address not in self.volatile:
+                        self.code.setdefault(address, []).append(entry)
+
+    def chunk(self, address):
+        """Returns the instructions that run from the given entry up to the next
+        jump, output or halt (or the end of the instructions that were found).
+        An instruction that runs past the end of the program (e.g. data that
+        happens to decode as one) also ends the chunk, and is left to the
+        interpreter.
+        """
+        instructions = []
+        while address in self.disassembler.instructions:
+            instruction = self.disassembler.instructions[address]
+            if address + instruction.length > len(self.program):
+                break
+            instructions.append(instruction)
+            if instruction.operation in (4, 5, 6, 99):
+                break
+            address += instruction.length
+        return instructions
+
+    def generate(self):
+        """Returns the source code of the module."""
+        self.temporaries = 0
+        lines = ['def run(m, pc, rb, read_input, write_output, trace, invalidated, code=CODE):',
+                 '    steps = 0',
+                 '    while True:',
+                 '        if invalidated and pc in invalidated:',
+                 '            return CODE_WRITTEN, pc, rb, steps']
+        self.generate_dispatch(lines, sorted(self.chunks), 2)
+        lines.append('        return UNKNOWN_ADDRESS, pc, rb, steps')
+
+        code = {address: tuple(entries) for address, entries in sorted(self.code.items())}
+        return '\n'.join(['# Intcode program compiled ahead of time',
+                          'CODE = {!r}'.format(code),
+                          ''] + lines) + '\n'
+
+    def generate_dispatch(self, lines, entries, depth):
+        """Adds the branches for the given (sorted) entries, split in half until
+        there are few enough of them to test one at a time.
+        """
+        indent = '    ' * depth
+        if len(entries) <= LINEAR_DISPATCH:
+            for entry in entries:
+                lines.append('{}if pc == {}:'.format(indent, entry))
+                self.generate_chunk(lines, entry, depth + 1)
+            return
+
+        middle = len(entries) // 2
+        lines.append('{}if pc < {}:'.format(indent, entries[middle]))
+        self.generate_dispatch(lines, entries[:middle], depth + 1)
+        lines.append('{}else:'.format(indent))
+        self.generate_dispatch(lines, entries[middle:], depth + 1)
+
+    def generate_chunk(self, lines, entry, depth):
+        """Adds the code for the instructions that run from the given entry."""
+        indent = '    ' * depth
+        chunk = self.chunks[entry]
+        end = chunk[-1].address + chunk[-1].length
+        # the number of instructions executed so far in this chunk
+        count = 0
+
+        def leave(status, pc, indent=indent):
+            if count:
+                lines.append('{}steps += {}'.format(indent, count))
+            lines.append('{}return {}, {}, rb, steps'.format(indent, status, pc))
+
+        for instruction in chunk:
+            address = instruction.address
+            operation = instruction.operation
+            modes = instruction.modes
+            next_address = address + instruction.length
+            lines.append('{}# {}: {}'.format(indent, address, ','.join(
+                map(str, (instruction.opcode,) + instruction.parameters))))
+
+            # volatile parameters are read from memory at runtime
+            parameters = []
+            for parameter_address in range(address + 1, next_address):
+                if parameter_address in self.volatile:
+                    parameters.append('m[{}]'.format(parameter_address))
+                else:
+                    parameters.append(self.program[parameter_address])
+
+            def generate_write(value):
+                """Adds the write for the instruction's last parameter. Returns
+                True if it lands further on in this chunk, which ends it.
+                """
+                lines.extend(self.generate_write(indent, modes[-1], parameters[-1], value))
+                target = parameters[-1]
+
+                # the address is known now, so the check can be made now
+                if modes[-1] == 0 and isinstance(target, int):
+                    if target not in self.code:
+                        return False
+                    if next_address <= target < end:
+                        leave('CODE_WRITTEN', next_address)
+                        return True
+                    lines.append('{}invalidated.update({!r})'.format(
+                        indent, tuple(self.code[target])))
+                    return False
+
+                lines.append('{}if a in code:'.format(indent))
+                lines.append('{}    invalidated.update(code[a])'.format(indent))
+                if next_address < end:
+                    lines.append('{}    if {} <= a < {}:'.format(indent, next_address, end))
+                    leave('CODE_WRITTEN', next_address, indent + '        ')
+                return False
+
+            # halt instruction
+            if operation == 99:
+                leave('HALTED', address)
+                return
+
+            # input
+            if operation == 3:
+                lines.append('{}try:'.format(indent))
+                lines.append('{}    value = read_input()'.format(indent))
+                lines.append('{}except (IndexError, StopIteration):'.format(indent))
+                leave('NEEDS_INPUT', address, indent + '    ')
+                lines.append('{}if trace is not None:'.format(indent))
+                lines.append('{}    trace.record_input(value)'.format(indent))
+                count += 1
+                if generate_write('value'):
+                    return
+
+            # output
+            elif operation == 4:
+                value = self.generate_read(lines, indent, modes[0], parameters[0])
+                lines.append('{}if trace is not None:'.format(indent))
+                lines.append('{}    trace.record_output({})'.format(indent, value))
+                lines.append('{}write_output({})'.format(indent, value))
+                count += 1
+                leave('OUTPUT_READY', next_address)
+                return
+
+            # jumps
+            elif operation in (5, 6):
+                value = self.generate_read(lines, indent, modes[0], parameters[0])
+                count += 1
+                lines.append('{}steps += {}'.format(indent, count))
+                lines.append('{}if {} {} 0:'.format(indent, value,
+                                                    '!=' if operation == 5 else '=='))
+                # the destination is only read if the jump is taken
+                destination = self.generate_read(lines, indent + '    ', modes[1], parameters[1])
+                lines.append('{}    pc = {}'.format(indent, destination))
+                lines.append('{}else:'.format(indent))
+                lines.append('{}    pc = {}'.format(indent, next_address))
+                lines.append('{}continue'.format(indent))
+                return
+
+            # relative base adjustment
+            elif operation == 9:
+                value = self.generate_read(lines, indent, modes[0], parameters[0])
+                lines.append('{}rb += {}'.format(indent, value))
+                count += 1
+
+            # additions, multiplications and comparisons
+            else:
+                value1 = self.generate_read(lines, indent, modes[0], parameters[0])
+                value2 = self.generate_read(lines, indent, modes[1], parameters[1])
+                if operation == 1:
+                    value = '{} + {}'.format(value1, value2)
+                elif operation == 2:
+                    value = '{} * {}'.format(value1, value2)
+                elif operation == 7:
+                    value = '1 if {} < {} else 0'.format(value1, value2)
+                else:
+                    value = '1 if {} == {} else 0'.format(value1, value2)
+                count += 1
+                if generate_write(value):
+                    return
+
+        # the rest of the program wasn't found statically
+        if count:
+            lines.append('{}steps += {}'.format(indent, count))
+        lines.append('{}pc = {}'.format(indent, end))
+        lines.append('{}continue'.format(indent))
+
+    def generate_read(self, lines, indent, mode, parameter):
+        """Returns an expression for the value of a "get" parameter (see
+        BlockCompiler.generate_read()).
+        """
+        self.temporaries += 1
+        return generate_read(lines, indent, mode, parameter, len(self.program),
+                             't{}'.format(self.temporaries))
+
+    def generate_write(self, indent, mode, parameter, value):
+        """Returns the lines that write value to the address given by a "set"
+        parameter. Addresses that aren't known until runtime are stored in a.
+        """
+        # position mode, with a constant address
+        if mode == 0 and isinstance(parameter, int):
+            if 0 <= parameter < len(self.program):
+                return ['{}m[{}] = {}'.format(indent, parameter, value)]
+            return ['{}m.write({}, {})'.format(indent, parameter, value)]
+
+        address = parameter if mode == 0 else 'rb + {}'.format(parameter)
+        lines = ['{}a = {}'.format(indent, address)]
+        generate_address_check(lines, indent, 'a')
+        return lines + ['{}try:'.format(indent),
+                        '{}    m[a] = {}'.format(indent, value),
+                        '{}except IndexError:'.format(indent),
+                        '{}    m.write(a, {})'.format(indent, value)]
+
+def cache_key(program):
+    """Returns a key that identifies the compiled code for a program."""
+    text = '{}:{}'.format(COMPILER_VERSION, ','.join(map(str, program)))
+    return digest(text.encode()).hex()
+
+def load_compiled_program(program):
+    """Returns a CompiledProgram for the given program (a list of values).
+
+    The module's bytecode is cached on disk, keyed by a hash of the program, so
+    each program is only translated and compiled once; later runs (in any
+    process) just load the bytecode. The most recently loaded programs are also
+    kept in this process.
+    """
+    program = tuple(program)
+    if program in loaded:
+        loaded.move_to_end(program)
+        return CompiledProgram(*loaded[program])
+
+    key = cache_key(program)
+    filename = os.path.join(CACHE_DIRECTORY, cache_filename(key))
+    try:
+        with open(filename, 'rb') as f:
+            data = f.read()
+        # the bytecode is only valid for the version of Python that wrote it
+        magic = importlib.util.MAGIC_NUMBER
+        if data[:len(magic)] != magic:
+            raise ValueError('compiled by a different version of Python')
+        code = marshal.loads(data[len(magic):])
+    except (OSError, ValueError, EOFError, TypeError):
+        compiler = ProgramCompiler(program)
+        code = compile(compiler.generate(), '<intcode program {}>'.format(key), 'exec')
+        try:
+            os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+            write_atomically(filename, importlib.util.MAGIC_NUMBER + marshal.dumps(code))
+            prune_cache()
+        except OSError:
+            # the cache directory may be read-only; the program just isn't cached
+            pass
+
+    # the statuses are imported here, since IntcodeComputer imports this module
+    from .IntcodeComputer import HALTED, NEEDS_INPUT, OUTPUT_READY
+    namespace = {'HALTED': HALTED,
+                 'NEEDS_INPUT': NEEDS_INPUT,
+                 'OUTPUT_READY': OUTPUT_READY,
+                 'UNKNOWN_ADDRESS': UNKNOWN_ADDRESS,
+                 'CODE_WRITTEN': CODE_WRITTEN}
+    exec(code, namespace)
+
+    loaded[program] = (namespace['run'], namespace['CODE'])
+    if len(loaded) > MAX_LOADED_PROGRAMS:
+        loaded.popitem(last=False)
+    return CompiledProgram(*loaded[program])
+
+def cache_filename(key):
+    """Returns the name of the file that caches the compiled program with the
+    given key, for this version of the compiler and of Python.
+    """
+    return 'intcode-{}-{}.{}.pyc'.format(COMPILER_VERSION, key, sys.implementation.cache_tag)
+
+def prune_cache():
+    """Deletes the cached programs that were written by other versions of the
+    compiler, along with the least recently written ones beyond
+    MAX_CACHED_PROGRAMS.
+    """
+    prefix = 'intcode-{}-'.format(COMPILER_VERSION)
+    filenames = []
+    for name in os.listdir(CACHE_DIRECTORY):
+        if not (name.startswith('intcode-') and name.endswith('.pyc')):
+            continue
+        filename = os.path.join(CACHE_DIRECTORY, name)
+        if name.startswith(prefix):
+            filenames.append(filename)
+        else:
+            remove(filename)
+
+    if len(filenames) > MAX_CACHED_PROGRAMS:
+        filenames.sort(key=modification_time)
+        for filename in filenames[:len(filenames) - MAX_CACHED_PROGRAMS]:
+            remove(filename)
+
+def modification_time(filename):
+    try:
+        return os.path.getmtime(filename)
+    except OSError:
+        # deleted by another process in the meantime
+        return 0
+
+def remove(filename):
+    try:
+        os.remove(filename)
+    except OSError:
+        # deleted by another process in the meantime
+        pass
@@ -0,0 +1,162 @@
+from array import array
+import hashlib
+import mmap
+import os
+import struct
+import sys
+
+# magic number, format version, number of values, digest of the text that the
+# image was parsed from, and checksum of the values
+HEADER = struct.Struct('<4sHxxQ16s16s')
+MAGIC = b'ICIM'
+VERSION = 1
+
+# images are cached next to the text file that they were parsed from
+IMAGE_EXTENSION = '.img'
+
+def digest(data):
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+def write_atomically(filename, data):
+    """Writes data to a file, through a temporary file, so that other processes
+    never see a partially written file.
+    """
+    temporary_filename = '{}.{}.tmp'.format(filename, os.getpid())
+    with open(temporary_filename, 'wb') as f:
+        f.write(data)
+    os.replace(temporary_filename, filename)
+
+class ProgramImage():
+    """A binary image of an intcode program: a header followed by the program's
+    values as little-endian 64-bit integers (an array('q') dump), so that loading
+    a program is a copy rather than a parse.
+
+    The header records a digest of the text that the image was parsed from,
+    which is used to tell whether a cached image is still up to date, along with
+    a checksum of the values, which is used to detect corrupt images.
+    """
+
+    def __init__(self, program, source_digest=bytes(16)):
+        self.program = array('q', program)
+        self.source_digest = source_digest
+
+    def to_bytes(self):
+        values = self.program
+        if sys.byteorder == 'big':
+            values = array('q', values)
+            values.byteswap()
+        values = values.tobytes()
+
+        header = HEADER.pack(MAGIC, VERSION, len(self.program), self.source_digest,
+                             digest(values))
+        return header + values
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Returns the image stored in data (bytes, or any buffer such as an
+        mmap). Raises ValueError if data isn't a valid image.
+        """
+        if len(data) < HEADER.size:
+            raise ValueError('truncated program image')
+        magic, version, count, source_digest, checksum = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('not a program image (or an unsupported version)')
+
+        values = memoryview(data)[HEADER.size:]
+        try:
+            if len(values) != count * 8 or digest(values) != checksum:
+                raise ValueError('corrupt program image')
+
+            image = cls((), source_digest)
+            image.program.frombytes(values)
+        finally:
+            values.release()
+
+        if sys.byteorder == 'big':
+            image.program.byteswap()
+        return image
+
+    def write(self, filename):
+        write_atomically(filename, self.to_bytes())
+
+    @classmethod
+    def read(cls, filename):
+        """Reads the image stored in a file, by mapping it into memory."""
+        with open(filename, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return cls.from_bytes(data)
+
+def load_program(filename):
+    """Returns the intcode program stored (as text) in the given file. Its image
+    is cached in a file next to it, and reused for as long as the text doesn't
+    change, so the text is only parsed once.
+    """
+    with open(filename, 'rb') as f:
+        text = f.read()
+    source_digest = digest(text)
+    image_filename = filename + IMAGE_EXTENSION
+
+    try:
+        image = ProgramImage.read(image_filename)
+        if image.source_digest == source_digest:
+            return image.program.tolist()
+    except (OSError, ValueError):
+        # no cached image (or an unreadable one), so it's rebuilt below
+        pass
+
+    program = list(map(int, text.split(b'\n', 1)[0].split(b',')))
+    try:
+        ProgramImage(program, source_digest).write(image_filename)
+    except (OverflowError, OSError):
+        # values that don't fit in 64 bits can't be stored in an image, and the
+        # directory may be read-only; either way, the program isn't cached
+        pass
+    return program
+
+def test():
+    import tempfile
+
+    program = [109, 1, 204, -1, 1001, 100, 1, 100, 1008, 100, 16, 101, 1006, 101, 0, 99,
+               -2 ** 63, 2 ** 63 - 1]
+    data = ProgramImage(program, digest(b'source')).to_bytes()
+    image = ProgramImage.from_bytes(data)
+    assert image.program.tolist() == program and image.source_digest == digest(b'source')
+
+    # a changed value no longer matches the checksum
+    corrupt = bytearray(data)
+    corrupt[-1] ^= 1
+    for bad_data in [bytes(corrupt), data[:-8], data[:HEADER.size - 1], b'ICTR' + data[4:]]:
+        try:
+            ProgramImage.from_bytes(bad_data)
+            assert False, 'bad image was read'
+        except ValueError:
+            pass
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'program.in')
+        image_filename = filename + IMAGE_EXTENSION
+        with open(filename, 'w') as f:
+            f.write(','.join(map(str, program)) + '\n')
+
+        with open(filename, 'rb') as f:
+            source_digest = digest(f.read())
+
+        # the first load parses the text and caches its image, which later
+        # loads read instead
+        assert load_program(filename) == program
+        assert ProgramImage.read(image_filename).source_digest == source_digest
+        ProgramImage([99], source_digest).write(image_filename)
+        assert load_program(filename) == [99]
+
+        # a corrupt image is replaced by a new one
+        with open(image_filename, 'r+b') as f:
+            f.seek(-1, os.SEEK_END)
+            f.write(b'\xff')
+        assert load_program(filename) == program
+        assert ProgramImage.read(image_filename).program.tolist() == program
+
+        # so is an image of old text
+        with open(filename, 'w') as f:
+            f.write('1,0,0,0,99\n')
+        assert load_program(filename) == [1, 0, 0, 0, 99]
+        assert ProgramImage.read(image_filename).program.tolist() == [1, 0, 0, 0, 99]
@@ -0,0 +1,109 @@
+from collections import deque
+
+from .IntcodeComputer import HALTED, NEEDS_INPUT, OUTPUT_READY
+
+class Scheduler():
+    """Multiplexes many IntcodeComputers in a single thread, giving each of them
+    a fair share of steps.
+
+    Computers take turns in round-robin order. On its turn, a computer runs for
+    up to one timeslice of steps (see IntcodeComputer.run()); producing output
+    doesn't end its turn, but halting or needing input that hasn't been sent yet
+    does. So no computer can hold up the others for more than a timeslice, and
+    computers that are waiting for input cost almost nothing until it arrives.
+
+    Computers communicate through their channels as usual, e.g. by sharing a
+    deque as one's output channel and another's input channel.
+    """
+
+    def __init__(self, computers=(), timeslice=1000):
+        self.timeslice = timeslice
+        # the computers that haven't halted yet, in the order of their turns
+        self.computers = deque(computers)
+        # the status that each computer returned at the end of its last turn
+        self.statuses = {}
+
+    def add(self, computer):
+        self.computers.append(computer)
+
+    def run_timeslice(self, computer):
+        """Runs a computer for up to one timeslice, and returns its status."""
+        deadline = computer.steps + self.timeslice
+        while True:
+            status = computer.run(deadline - computer.steps)
+            if status != OUTPUT_READY or computer.steps >= deadline:
+                return status
+
+    def round(self):
+        """Gives each computer that hasn't halted one turn. Returns whether any of
+        them made progress (i.e. took any steps, or halted).
+        """
+        progress = False
+        for _ in range(len(self.computers)):
+            computer = self.computers.popleft()
+            steps = computer.steps
+            status = self.run_timeslice(computer)
+            self.statuses[computer] = status
+
+            if status == HALTED:
+                progress = True
+            else:
+                progress = progress or computer.steps != steps
+                self.computers.append(computer)
+
+        return progress
+
+    def run(self, max_rounds=None):
+        """Runs rounds until every computer has halted, until the remaining ones
+        are all waiting for input that no computer is going to send, or until
+        max_rounds rounds have been run. Returns the computers that haven't
+        halted.
+        """
+        rounds = 0
+        while self.computers and rounds != max_rounds:
+            rounds += 1
+            if not self.round():
+                break
+
+        return list(self.computers)
+
+    def waiting(self):
+        """Returns the computers whose last turn ended because they needed input."""
+        return [computer for computer in self.computers
+                if self.statuses.get(computer) == NEEDS_INPUT]
+
+def test():
+    from itertools import permutations
+    import os
+
+    from .IntcodeComputer import IntcodeComputer, load
+
+    def feedback_loop(program, phase_sequence, timeslice):
+        """Returns the last signal of a day 7 amplifier feedback loop."""
+        channels = [deque([phase_setting]) for phase_setting in phase_sequence]
+        channels[0].append(0)
+        scheduler = Scheduler(timeslice=timeslice)
+        for i, channel in enumerate(channels):
+            scheduler.add(IntcodeComputer(program, channel, channels[(i + 1) % len(channels)]))
+        assert scheduler.run() == []
+        return channels[0][-1]
+
+    # the example from the day 7 puzzle
+    program = [3, 26, 1001, 26, -4, 26, 3, 27, 1002, 27, 2, 27, 1, 27, 26, 27, 4, 27, 1001,
+               28, -1, 28, 1005, 28, 6, 99, 0, 0, 5]
+    for timeslice in [1, 3, 1000]:
+        assert feedback_loop(program, (9, 8, 7, 6, 5), timeslice) == 139629729
+
+    filename = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                            'IntcodePrograms', '7.in')
+    program = load(filename)
+    assert max(feedback_loop(program, phase_sequence, 1000)
+               for phase_sequence in permutations(range(5, 10))) == 27561242
+
+    # computers that are all waiting for input are left waiting
+    channels = [deque(), deque()]
+    computers = [IntcodeComputer([3, 0, 99], channel, []) for channel in channels]
+    scheduler = Scheduler(computers)
+    assert scheduler.run() == computers and scheduler.waiting() == computers
+    channels[1].append(1)
+    assert scheduler.run() == [computers[0]]
@@ -0,0 +1,223 @@
+import struct
+import sys
+import time
+
+from .IntcodeComputer import IntcodeComputer, OUTPUT_READY, load
+from .ProgramImage import digest
+
+# magic number, format version, number of events, and digest of the program
+HEADER = struct.Struct('<4sHxxQ16s')
+MAGIC = b'ICTR'
+VERSION = 1
+
+# kinds of events
+INPUT = 0
+OUTPUT = 1
+
+def program_digest(program):
+    """Returns a digest that identifies a program (or a computer's memory)."""
+    return digest(','.join(map(str, program)).encode())
+
+def encode_events(events):
+    """Encodes (kind, value) events as variable-length integers: each value is
+    zigzag encoded (so that small negative values stay small), shifted left to
+    make room for its kind, and stored 7 bits per byte, lowest bits first.
+    """
+    data = bytearray()
+    for kind, value in events:
+        number = (value << 1 if value >= 0 else (-value << 1) - 1) << 1 | kind
+        while number >= 0x80:
+            data.append(number & 0x7f | 0x80)
+            number >>= 7
+        data.append(number)
+    return data
+
+def decode_events(data, count):
+    """Decodes count events encoded by encode_events()."""
+    events = []
+    number = shift = 0
+    for byte in data:
+        number |= (byte & 0x7f) << shift
+        shift += 7
+        if byte & 0x80:
+            continue
+
+        kind = number & 1
+        number >>= 1
+        events.append((kind, number >> 1 if not number & 1 else -((number + 1) >> 1)))
+        number = shift = 0
+
+    if len(events) != count or shift:
+        raise ValueError('corrupt trace')
+    return events
+
+class Trace():
+    """A record of the inputs and outputs of a run of an intcode program, in the
+    order that they happened.
+
+    Traces are recorded by attaching them to a computer before it runs (see
+    record()), whichever way the computer is then driven. A trace can be
+    replayed against the same program without whatever drove the original run
+    (e.g. a robot controller), and is checked against the program's outputs as
+    it goes, so interactive runs can be reproduced and timed on their own.
+    """
+
+    def __init__(self, program_digest=bytes(16)):
+        self.program_digest = program_digest
+        # (INPUT or OUTPUT, value)
+        self.events = []
+
+    @classmethod
+    def record(cls, computer):
+        """Returns a new trace that records the inputs and outputs of the given
+        computer, which shouldn't have run yet.
+        """
+        trace = cls(program_digest(computer.program))
+        computer.trace = trace
+        return trace
+
+    def copy(self):
+        """Returns a copy of this trace, which records separately from it (e.g.
+        for a forked computer).
+        """
+        trace = Trace(self.program_digest)
+        trace.events = list(self.events)
+        return trace
+
+    def record_input(self, value):
+        self.events.append((INPUT, value))
+
+    def record_output(self, value):
+        self.events.append((OUTPUT, value))
+
+    @property
+    def inputs(self):
+        return [value for kind, value in self.events if kind == INPUT]
+
+    @property
+    def outputs(self):
+        return [value for kind, value in self.events if kind == OUTPUT]
+
+    def to_bytes(self):
+        header = HEADER.pack(MAGIC, VERSION, len(self.events), self.program_digest)
+        return header + encode_events(self.events)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Returns the trace stored in data. Raises ValueError if data isn't a
+        valid trace.
+        """
+        if len(data) < HEADER.size:
+            raise ValueError('truncated trace')
+        magic, version, count, program_digest = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('not a trace (or an unsupported version)')
+
+        trace = cls(program_digest)
+        trace.events = decode_events(data[HEADER.size:], count)
+        return trace
+
+    def write(self, filename):
+        with open(filename, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def read(cls, filename):
+        with open(filename, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+    def replay(self, program, **options):
+        """Runs the program, feeding it the recorded inputs, until it halts or
+        needs more input than was recorded, and returns the computer. Raises
+        ValueError if the program doesn't reproduce the recorded run. Any
+        keyword arguments are passed to the IntcodeComputer.
+        """
+        if program_digest(program) != self.program_digest:
+            raise ValueError('the trace was recorded from a different program')
+
+        events = self.events
+        position = 0
+
+        def read_input():
+            nonlocal position
+            if position == len(events):
+                raise IndexError('end of trace')
+            kind, value = events[position]
+            if kind != INPUT:
+                raise ValueError('the program asked for input at event {}, but an output '
+                                 'of {} was recorded'.format(position, value))
+            position += 1
+            return value
+
+        def write_output(value):
+            nonlocal position
+            if position == len(events) or events[position] != (OUTPUT, value):
+                raise ValueError('the program output {} at event {}, which differs from '
+                                 'the trace'.format(value, position))
+            position += 1
+
+        computer = IntcodeComputer(program, read_input, write_output, **options)
+        while computer.run() == OUTPUT_READY:
+            pass
+
+        if position != len(events):
+            raise ValueError('the program stopped after {} of the trace\'s {} '
+                             'events'.format(position, len(events)))
+        return computer
+
+def test():
+    # doubles each of its inputs, forever
+    program = [3, 11, 1002, 11, 2, 11, 4, 11, 1105, 1, 0, 0]
+    inputs = [1, -7, 2 ** 40, 0, -2 ** 62]
+    computer = IntcodeComputer(program, list(inputs), [])
+    trace = Trace.record(computer)
+    while computer.run() == OUTPUT_READY:
+        pass
+    assert trace.inputs == inputs and trace.outputs == [2 * value for value in inputs]
+
+    trace = Trace.from_bytes(trace.to_bytes())
+    assert trace.inputs == inputs and trace.outputs == [2 * value for value in inputs]
+    for options in [{}, {'compile_blocks': True}, {'fuse_instructions': True},
+                    {'compile_program': True}]:
+        computer = trace.replay(program, **options)
+        assert computer.steps == 4 * len(inputs), options
+
+    # a run that differs from the trace, or a different program, is rejected
+    changed = Trace.from_bytes(trace.to_bytes())
+    changed.events[-1] = (OUTPUT, 0)
+    for replayed_trace, replayed_program in [(changed, program), (trace, program[:-1] + [1])]:
+        try:
+            replayed_trace.replay(replayed_program)
+            assert False, 'replay succeeded'
+        except ValueError:
+            pass
+    for data in [trace.to_bytes()[:HEADER.size - 1], b'ICIM' + trace.to_bytes()[4:]]:
+        try:
+            Trace.from_bytes(data)
+            assert False, 'bad trace was read'
+        except ValueError:
+            pass
+
+def main():
+    """When called from the command line with an intcode program and a trace of
+    one of its runs, replay the trace and report how fast it ran.
+
+    Usage: python3 -m intcode replay PROGRAM TRACE [--compile-blocks]
+                                                   [--fuse-instructions]
+                                                   [--compile-program]
+    """
+    program = load(sys.argv[1])
+    trace = Trace.read(sys.argv[2])
+    options = {'compile_blocks': '--compile-blocks' in sys.argv[3:],
+               'fuse_instructions': '--fuse-instructions' in sys.argv[3:],
+               'compile_program': '--compile-program' in sys.argv[3:]}
+
+    start = time.perf_counter()
+    computer = trace.replay(program, **options)
+    wall_time = time.perf_counter() - start
+
+    print('{} events, {:,} steps in {:.3f}s ({:,.0f} steps/s)'.format(
+        len(trace.events), computer.steps, wall_time, computer.steps / wall_time))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""The Intcode computer from Advent of Code 2019.
+
+    from intcode import IntcodeComputer, load, run
+
+    outputs = []
+    memory = run(load('IntcodePrograms/9.in'), [1], outputs)
+
+IntcodeComputer runs a program with pluggable input and output channels (see
+input_reader and output_writer), either to completion with run_program(),
+interactively with run_iter(), or in bounded steps with run(max_steps), which
+the round-robin Scheduler uses to interleave many computers. An AmplifierChain
+wires computers together in series (or in a feedback loop), as in day 7, and an
+AmplifierSearch finds the best phase settings for a chain. The
+AsyncIntcodeComputer module wraps a computer for asyncio, with queues as its
+channels. A Trace records a computer's inputs and outputs, so that the run can
+be replayed later without whatever drove it. load() caches each parsed program
+as a binary ProgramImage next to its text file. The optional tiers (block
+compilation, instruction fusion, ahead-of-time compilation of the whole program
+and profiling) and copy-on-write PagedMemory are enabled with keyword
+arguments. The NumPy-based BatchComputer and the multiprocessing ParameterSweep
+and ParallelAmplifierSearch live in their own modules, so that importing the
+package doesn't require NumPy.
+"""
+
+from .AmplifierChain import AmplifierChain, AmplifierSearch
+from .IntcodeComputer import (IntcodeComputer, Memory, PagedMemory, HALTED, NEEDS_INPUT,
+                              OUTPUT_READY, BUDGET_EXHAUSTED, input_reader,
+                              output_writer, load, run)
+from .ProgramImage import ProgramImage
+from .Scheduler import Scheduler
+from .Trace import Trace
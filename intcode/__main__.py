@@ -0,0 +1,50 @@
+"""Command line entry point for the package:
+
+    python3 -m intcode PROGRAM [--profile]
+    python3 -m intcode disassemble PROGRAM [--json]
+    python3 -m intcode benchmark [workload ...] [options]
+    python3 -m intcode replay PROGRAM TRACE [options]
+    python3 -m intcode amplifiers PROGRAM [options]
+    python3 -m intcode test
+"""
+import importlib
+import sys
+
+from .Benchmark import main as benchmark
+from .Disassembler import main as disassemble
+from .IntcodeComputer import main as run
+from .ParallelAmplifierSearch import main as amplifiers
+from .Trace import main as replay
+
+# the modules whose test() functions the test command runs
+TESTED_MODULES = ['IntcodeComputer',
+                  'BatchComputer',
+                  'ParameterSweep',
+                  'ProgramImage',
+                  'Scheduler',
+                  'AsyncIntcodeComputer',
+                  'Trace',
+                  'AmplifierChain']
+
+def test():
+    for name in TESTED_MODULES:
+        try:
+            module = importlib.import_module('.' + name, __package__)
+        except ModuleNotFoundError as error:
+            # numpy is only needed by the batch computer
+            if error.name != 'numpy':
+                raise
+            print('Skipping the {} tests, since numpy isn\'t installed'.format(name))
+            continue
+        module.test()
+
+COMMANDS = {'disassemble': disassemble,
+            'benchmark': benchmark,
+            'replay': replay,
+            'amplifiers': amplifiers,
+            'test': test}
+
+if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+    COMMANDS[sys.argv.pop(1)]()
+else:
+    run()